@@ -8,16 +8,43 @@
 
 """API for manipulating files associated to a record."""
 
+import json
+import os
+import uuid
+import zlib
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import deepcopy
 from functools import wraps
 
+from flask import current_app
 from invenio_db import db
-from invenio_files_rest.errors import InvalidOperationError
-from invenio_files_rest.models import Bucket, ObjectVersion
+from invenio_files_rest.errors import FileSizeError, InvalidOperationError
+from invenio_files_rest.helpers import chunk_size_or_default
+from invenio_files_rest.models import (
+    Bucket,
+    FileInstance,
+    MultipartObject,
+    ObjectVersion,
+    ObjectVersionTag,
+    Part,
+)
 from invenio_records.api import Record as _Record
 from invenio_records.errors import MissingModelError
+from sqlalchemy import insert
+from sqlalchemy.orm import contains_eager, joinedload
 
+from .hashing import MultiHashStream
 from .models import RecordsBuckets
+from .permissions import invalidate_permission_cache
+from .signals import record_files_changed
+from .storage import (
+    compute_checksums,
+    is_local_storage,
+    local_source,
+    save_local_file,
+    update_local_file,
+)
 from .utils import sorted_files_from_bucket
 
 
@@ -104,19 +131,250 @@ def _writable(method):
     return wrapper
 
 
+def _compute_checksum(app, storage):
+    """Compute the checksum of a file storage within an application context.
+
+    :returns: A tuple with the checksum and the error message (if any).
+    """
+    with app.app_context():
+        try:
+            return storage.checksum(), None
+        except Exception as exc:
+            return None, str(exc)
+
+
+def _save_file(app, storage, path, algorithms=None, size_limit=None):
+    """Save a local file into a file storage within an application context.
+
+    :returns: A tuple with the ``(uri, size, checksum)`` of the stored file and
+        the dictionary of extra checksums.
+    """
+    with app.app_context():
+        with open(path, "rb") as fp:
+            if is_local_storage(storage):
+                return save_local_file(
+                    storage, fp.fileno(), 0, size_limit, algorithms or []
+                )
+            stream = MultiHashStream(fp, algorithms) if algorithms else fp
+            try:
+                location = storage.save(stream, size_limit=size_limit)
+            finally:
+                checksums = stream.close() if algorithms else {}
+        return location, checksums
+
+
+def _same_content(fileinstance, other):
+    """Compare the contents of two file instances, chunk by chunk."""
+    chunk_size = chunk_size_or_default(None)
+    with fileinstance.storage().open() as fp:
+        with other.storage().open() as other_fp:
+            while True:
+                chunk = fp.read(chunk_size)
+                if chunk != other_fp.read(chunk_size):
+                    return False
+                if not chunk:
+                    return True
+
+
+def _deduplicate(obj):
+    """Link an object to an existing file instance with the same content.
+
+    The file instance of the object, which has just been stored, is deleted
+    together with its file if another readable file instance has the same
+    checksum, size and bytes. The bytes are compared as the checksum (MD5 by
+    default) is not collision-resistant.
+
+    :param obj: A :class:`~invenio_files_rest.models.ObjectVersion` instance.
+    :returns: ``True`` if the object has been linked to another file instance.
+    """
+    fileinstance = obj.file
+    candidates = FileInstance.query.filter(
+        FileInstance.checksum == fileinstance.checksum,
+        FileInstance.size == fileinstance.size,
+        FileInstance.readable.is_(True),
+        FileInstance.id != fileinstance.id,
+    )
+    existing = next((f for f in candidates if _same_content(fileinstance, f)), None)
+    if existing is None:
+        return False
+    obj.file = existing
+    db.session.delete(fileinstance)
+    fileinstance.storage().delete()
+    return True
+
+
+def _new_version(bucket, key, head=None, fileinstance=None):
+    """Create the head version of an object, given the current one.
+
+    Contrary to :meth:`~invenio_files_rest.models.ObjectVersion.create`, the
+    current head is not queried. Without a file instance, the new version is
+    a delete marker.
+
+    :param bucket: The bucket of the object.
+    :param key: The key of the object.
+    :param head: The current head version of the object, if any.
+    :param fileinstance: The file instance of the new version.
+    :returns: The created :class:`~invenio_files_rest.models.ObjectVersion`.
+    """
+    if head is not None:
+        head.is_head = False
+        if fileinstance is None:
+            bucket.size -= head.file.size
+    obj = ObjectVersion(bucket=bucket, key=key, version_id=uuid.uuid4(), is_head=True)
+    if fileinstance is not None:
+        obj.set_file(fileinstance)
+    db.session.add(obj)
+    return obj
+
+
+class _RangeReader(object):
+    """Read-only stream limited to a number of bytes of a file."""
+
+    def __init__(self, fp, size):
+        """Wrap a file positioned at the start of the range."""
+        self.fp = fp
+        self.remaining = size
+
+    def read(self, size=-1):
+        """Read data from the range."""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        chunk = self.fp.read(size)
+        self.remaining -= len(chunk)
+        return chunk
+
+
+def _upload_part(app, storage, path, offset, size):
+    """Write a part of a local file into a file storage.
+
+    The part is written at the same position in the storage, within an
+    application context.
+
+    :returns: The checksum of the part.
+    """
+    with app.app_context():
+        with open(path, "rb") as fp:
+            if is_local_storage(storage):
+                return update_local_file(storage, fp.fileno(), offset, size)[1]
+            fp.seek(offset)
+            return storage.update(_RangeReader(fp, size), seek=offset, size=size)[1]
+
+
+def _resume_part(app, storage, path, offset, size, checksum=None):
+    """Upload a part of a local file, unless it has already been uploaded.
+
+    :param checksum: Checksum of the part already uploaded, if any. The part
+        is uploaded again if it does not match the local file anymore.
+    :returns: The checksum of the uploaded part, or ``None`` if the part
+        already uploaded is kept.
+    """
+    if checksum is not None:
+        with app.app_context():
+            with open(path, "rb") as fp:
+                if compute_checksums(storage, fp.fileno(), offset, size)[0] == checksum:
+                    return None
+    return _upload_part(app, storage, path, offset, size)
+
+
+def _hash_file(app, storage, path, algorithms=None):
+    """Compute the checksums of a local file within an application context.
+
+    :returns: A tuple with the checksum computed with the algorithm of the
+        storage and the dictionary of extra checksums.
+    """
+    with app.app_context():
+        with open(path, "rb") as fp:
+            return compute_checksums(
+                storage, fp.fileno(), 0, os.fstat(fp.fileno()).st_size, algorithms
+            )
+
+
+def _walk(path):
+    """Get the ``(path, key)`` pairs of the files of a directory tree."""
+    if os.path.isfile(path):
+        return [(path, os.path.basename(path))]
+    items = []
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            filepath = os.path.join(root, name)
+            key = os.path.relpath(filepath, path).replace(os.sep, "/")
+            items.append((filepath, key))
+    return sorted(items, key=lambda item: item[1])
+
+
+_DIRTY_FILES = "invenio_records_files_dirty"
+"""Key of the session info holding the files iterators to write."""
+
+
+def write_dirty_files(session):
+    """Write the files of the records changed in a transaction.
+
+    Listener of the ``before_commit`` session event, used with
+    :data:`invenio_records_files.config.RECORDS_FILES_DEFERRED_FLUSH`. The
+    head objects of all the changed records are fetched in one query, then
+    ``_files`` is computed once per record and stored in the record model.
+    """
+    if session.in_nested_transaction():
+        return
+    dirty = session.info.pop(_DIRTY_FILES, None)
+    if not dirty:
+        return
+
+    objects = {}
+    for obj, fileinstance in (
+        session.query(ObjectVersion, FileInstance)
+        .join(FileInstance, FileInstance.id == ObjectVersion.file_id)
+        .filter(
+            ObjectVersion.bucket_id.in_({files.bucket.id for files in dirty.values()}),
+            ObjectVersion.is_head.is_(True),
+        )
+    ):
+        objects.setdefault(obj.bucket_id, []).append(obj)
+
+    for files in dirty.values():
+        files._write(files.dumps(objects=objects.get(files.bucket.id, [])))
+        model = files.record.model
+        if model is not None and model.json is not None and "_files" in files.record:
+            model.json = dict(model.json, _files=deepcopy(files.record["_files"]))
+
+
+def discard_dirty_files(session, transaction):
+    """Forget the changed files when a transaction ends without commit."""
+    if transaction.parent is None:
+        session.info.pop(_DIRTY_FILES, None)
+
+
 class FilesIterator(object):
     """Iterator for files."""
 
-    def __init__(self, record, bucket=None, file_cls=None):
-        """Initialize iterator."""
+    def __init__(
+        self, record, bucket=None, file_cls=None, records_buckets=None, objects=None
+    ):
+        """Initialize iterator.
+
+        :param records_buckets: The
+            :class:`~invenio_records_files.models.RecordsBuckets` object of
+            the record, whose manifest (if any) lists the files instead of
+            the ``_files`` key of the record.
+        :param objects: Prefetched head objects of the bucket (see
+            :meth:`FilesMixin.prefetch_files`), used until the files change.
+        """
         self._it = None
         self.record = record
         self.model = record.model
         self.file_cls = file_cls or FileObject
         self.bucket = bucket
-        self.filesmap = OrderedDict(
-            [(f["key"], f) for f in self.record.get("_files", [])]
-        )
+        self.records_buckets = records_buckets
+        self._objects = objects
+        pending = db.session.info.get(_DIRTY_FILES, {}).get(id(record))
+        if pending is not None:
+            # Changes not yet written to the record.
+            self.filesmap = pending.filesmap
+            return
+        files = records_buckets.files if records_buckets is not None else None
+        if files is None:
+            files = self.record.get("_files", [])
+        self.filesmap = OrderedDict([(f["key"], f) for f in files])
 
     @property
     def keys(self):
@@ -125,11 +383,15 @@ class FilesIterator(object):
 
     def __len__(self):
         """Get number of files."""
+        if self._objects is not None:
+            return len(self._objects)
         return ObjectVersion.get_by_bucket(self.bucket).count()
 
     def __iter__(self):
         """Get iterator."""
-        self._it = iter(sorted_files_from_bucket(self.bucket, self.keys))
+        self._it = iter(
+            sorted_files_from_bucket(self.bucket, self.keys, objects=self._objects)
+        )
         return self
 
     def next(self):
@@ -143,35 +405,232 @@ class FilesIterator(object):
 
     def __contains__(self, key):
         """Test if file exists."""
+        if self._objects is not None:
+            return any(obj.key == key for obj in self._objects)
         return ObjectVersion.get_by_bucket(self.bucket).filter_by(key=key).count()
 
     def __getitem__(self, key):
         """Get a specific file."""
-        obj = ObjectVersion.get(self.bucket, key)
+        if self._objects is not None:
+            obj = next((o for o in self._objects if o.key == key), None)
+        else:
+            obj = ObjectVersion.get(self.bucket, key)
         if obj:
             return self.file_cls(obj, self.filesmap.get(obj.key, {}))
         raise KeyError(key)
 
     def flush(self):
-        """Flush changes to record."""
-        files = self.dumps()
+        """Flush changes to record.
+
+        If :data:`invenio_records_files.config.RECORDS_FILES_DEFERRED_FLUSH`
+        is set, the files of the record are only marked as changed, and are
+        written once when the transaction is committed.
+        """
+        self._forget_prefetched()
+        if current_app.config.get("RECORDS_FILES_DEFERRED_FLUSH"):
+            db.session.info.setdefault(_DIRTY_FILES, {})[id(self.record)] = self
+        else:
+            self._write(self.dumps())
+
+    def _forget_prefetched(self):
+        """Stop using the prefetched objects, once the files changed."""
+        self._objects = None
+        self.record._files_prefetched = None
+
+    def _write(self, files):
+        """Write a list of files to the record.
+
+        If :data:`invenio_records_files.config.RECORDS_FILES_MANIFEST_INLINE_LIMIT`
+        is set, the full list is stored in the manifest and only its first
+        entries in the record.
+        """
+        self._forget_prefetched()
+        if self.records_buckets is not None:
+            limit = current_app.config.get("RECORDS_FILES_MANIFEST_INLINE_LIMIT")
+            if limit is not None:
+                self.records_buckets.files = files
+                files = files[:limit]
+            elif self.records_buckets.manifest is not None:
+                self.records_buckets.files = None
         # Do not create `_files` when there has not been `_files` field before
         # and the record still has no files attached.
         if files or "_files" in self.record:
             self.record["_files"] = files
 
+    def _changed(self, keys):
+        """Send the signal of a change of the files of the record."""
+        if keys:
+            record_files_changed.send(
+                current_app._get_current_object(), record=self.record, keys=keys
+            )
+
+    def begin_merge(self):
+        """Remember the current files, to merge the changes made later.
+
+        See :meth:`merge`. The files are remembered again every time the
+        record is committed.
+
+        :returns: The files iterator.
+        """
+        self._set_baseline()
+        return self
+
+    def _set_baseline(self):
+        """Remember the files of the record, to merge the changes made later.
+
+        The list is kept serialized (or compressed, from the manifest), so
+        that later changes do not alter it.
+        """
+        if self.records_buckets is not None and self.records_buckets.manifest:
+            self.record._files_baseline = self.records_buckets.manifest
+        else:
+            self.record._files_baseline = json.dumps(list(self.filesmap.values()))
+
+    def _get_baseline(self):
+        """Get the files of the record when the baseline was taken."""
+        baseline = self.record._files_baseline
+        if isinstance(baseline, bytes):
+            baseline = zlib.decompress(baseline).decode("utf-8")
+        return {f["key"]: f for f in json.loads(baseline)}
+
+    def merge(self):
+        """Merge the changes of the files into the latest version of the record.
+
+        Instead of the whole list of files, only the entries added, modified
+        or removed since :meth:`begin_merge` was called (or the record was
+        last committed) are applied, on the latest version of the record
+        locked with ``SELECT ... FOR UPDATE``, and the record is committed.
+        Concurrent uploads of different files to the same record therefore
+        neither fail the optimistic version check nor overwrite each other.
+        The order of the files is not merged (new files are appended), and
+        other unsaved changes of the record metadata are discarded.
+
+        :returns: The committed record.
+        :raises RuntimeError: If :meth:`begin_merge` has not been called.
+        """
+        if getattr(self.record, "_files_baseline", None) is None:
+            raise RuntimeError("Call begin_merge() before changing the files.")
+        baseline = self._get_baseline()
+        changed = OrderedDict(
+            (key, entry)
+            for key, entry in self.filesmap.items()
+            if baseline.get(key) != json.loads(json.dumps(entry))
+        )
+        removed = [key for key in baseline if key not in self.filesmap]
+
+        with db.session.begin_nested():
+            model = (
+                db.session.query(type(self.model))
+                .filter_by(id=self.model.id)
+                .with_for_update()
+                .populate_existing()
+                .one()
+            )
+            self.record.clear()
+            self.record.update(model.data)
+            files = None
+            if self.records_buckets is not None:
+                db.session.refresh(self.records_buckets)
+                files = self.records_buckets.files
+            if files is None:
+                files = self.record.get("_files", [])
+
+            self.filesmap = OrderedDict((f["key"], f) for f in files)
+            self.filesmap.update(changed)
+            for key in removed:
+                self.filesmap.pop(key, None)
+            self._write(list(self.filesmap.values()))
+            self.record.commit()
+        self._set_baseline()
+        return self.record
+
     @_writable
     def __setitem__(self, key, stream):
         """Add file inside a deposit."""
         with db.session.begin_nested():
-            # save the file
-            obj = ObjectVersion.create(bucket=self.bucket, key=key, stream=stream)
-            self.filesmap[key] = self.file_cls(obj, {}).dumps()
+            obj, data = self._store(key, stream)
+            self.filesmap[key] = self.file_cls(obj, data).dumps()
             self.flush()
+        self._changed([key])
+
+    def _store(self, key, stream):
+        """Store a stream or a local file as a new version of an object.
+
+        :returns: A tuple with the created object and its file metadata.
+        """
+        data = {}
+        algorithms = current_app.config.get("RECORDS_FILES_EXTRA_CHECKSUMS")
+        # Local files are copied by the kernel when the bucket is local.
+        local = self._create_local_object(key, stream, algorithms)
+        if local is not None:
+            obj, checksums = local
+        elif isinstance(stream, (str, os.PathLike)):
+            with open(stream, "rb") as fp:
+                obj, checksums = self._create_object(key, fp, algorithms)
+        else:
+            obj, checksums = self._create_object(key, stream, algorithms)
+        if algorithms:
+            data["checksums"] = checksums
+        if current_app.config.get("RECORDS_FILES_DEDUPLICATE"):
+            _deduplicate(obj)
+        return obj, data
+
+    def _create_object(self, key, stream, algorithms):
+        """Create an object from a stream.
+
+        :returns: A tuple with the created object and the extra checksums.
+        """
+        if algorithms:
+            stream = MultiHashStream(stream, algorithms)
+        try:
+            obj = ObjectVersion.create(bucket=self.bucket, key=key, stream=stream)
+        finally:
+            checksums = stream.close() if algorithms else {}
+        return obj, checksums
+
+    def _create_local_object(self, key, stream, algorithms):
+        """Create an object from a local file, copied by the kernel.
+
+        :returns: A tuple with the created object and the extra checksums, or
+            ``None`` if the stream is not a local regular file or the files of
+            the bucket are not stored on the local file system.
+        """
+        source = local_source(stream)
+        if source is None:
+            return None
+        fd, offset, opened = source
+        try:
+            fileinstance = FileInstance(
+                id=uuid.uuid4(), writable=True, readable=False, size=0
+            )
+            storage = fileinstance.storage(
+                default_location=self.bucket.location.uri,
+                default_storage_class=self.bucket.default_storage_class,
+            )
+            if not is_local_storage(storage):
+                return None
+            location, checksums = save_local_file(
+                storage, fd, offset, self.bucket.size_limit, algorithms
+            )
+        finally:
+            if opened:
+                os.close(fd)
+        if not opened:
+            # Leave the stream where a read of the whole file would.
+            stream.seek(offset + location[1])
+
+        db.session.add(fileinstance)
+        fileinstance.set_uri(*location)
+        return ObjectVersion.create(self.bucket, key, _file_id=fileinstance), checksums
 
     @_writable
     def __delitem__(self, key):
         """Delete a file from the deposit."""
+        self._delete(key)
+        self._changed([key])
+
+    def _delete(self, key):
+        """Delete a file, without sending the change signal."""
         obj = ObjectVersion.delete(bucket=self.bucket, key=key)
 
         if obj is None:
@@ -181,6 +640,296 @@ class FilesIterator(object):
             del self.filesmap[key]
             self.flush()
 
+    @_writable
+    def import_from(self, source, workers=None):
+        """Import local files into the bucket.
+
+        The files are read, hashed and written to the storage by a pool of
+        threads, while the objects are created in the calling thread. The
+        record metadata is flushed once, after all the files are imported.
+
+        :param source: Path of a file or directory (in which case the keys are
+            the paths relative to it), or an iterable of ``(path, key)``
+            pairs.
+        :param workers: Maximum number of threads. (Default: the
+            :class:`~concurrent.futures.ThreadPoolExecutor` default)
+        :returns: List of the created
+            :class:`~invenio_files_rest.models.ObjectVersion` instances.
+        """
+        items = _walk(source) if isinstance(source, str) else list(source)
+        algorithms = current_app.config.get("RECORDS_FILES_EXTRA_CHECKSUMS")
+        deduplicate = current_app.config.get("RECORDS_FILES_DEDUPLICATE")
+        bucket = self.bucket
+        size_limit = bucket.size_limit
+        if size_limit is not None:
+            total = sum(os.path.getsize(path) for path, key in items)
+            if total > size_limit:
+                raise FileSizeError(
+                    description=(
+                        "File size limit exceeded."
+                        if isinstance(size_limit, int)
+                        else size_limit.reason
+                    )
+                )
+
+        app = current_app._get_current_object()
+        objs = []
+        storages = []
+        with db.session.begin_nested():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = []
+                for path, key in items:
+                    fileinstance = FileInstance.create()
+                    storage = fileinstance.storage(
+                        default_location=bucket.location.uri,
+                        default_storage_class=bucket.default_storage_class,
+                    )
+                    futures.append(
+                        executor.submit(
+                            _save_file, app, storage, path, algorithms, size_limit
+                        )
+                    )
+                    storages.append((fileinstance, storage))
+                try:
+                    for (path, key), (fileinstance, storage), future in zip(
+                        items, storages, futures
+                    ):
+                        location, checksums = future.result()
+                        fileinstance.set_uri(*location)
+                        obj = ObjectVersion.create(bucket, key, _file_id=fileinstance)
+                        data = {"checksums": checksums} if algorithms else {}
+                        self.filesmap[key] = self.file_cls(obj, data).dumps()
+                        objs.append(obj)
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    for (fileinstance, storage), future in zip(storages, futures):
+                        # Failed saves already removed their partial file.
+                        if not future.cancelled() and future.exception() is None:
+                            storage.delete()
+                    raise
+            if deduplicate:
+                for obj in objs:
+                    if _deduplicate(obj):
+                        self.filesmap[obj.key] = self.file_cls(
+                            obj, self.filesmap[obj.key]
+                        ).dumps()
+            self.flush()
+        self._changed([obj.key for obj in objs])
+        return objs
+
+    @_writable
+    def sync(self, manifest):
+        """Make the files of the record match a manifest.
+
+        The manifest is compared with the head objects of the bucket, fetched
+        in one query. Only new and modified files are uploaded, files missing
+        from the manifest are deleted, and a new key whose content is the one
+        of a deleted key is renamed instead of uploaded. All the changes are
+        made in one transaction, and the record metadata is flushed once.
+
+        :param manifest: Dictionary of the desired files by key. Each value is
+            a dictionary with the ``checksum`` (in the format of
+            ``FileInstance.checksum``, e.g. ``md5:<hex digest>``) and ``size``
+            of the file, and its ``stream``: a file-like object, the path of a
+            local file, or a callable returning one of them, which is only
+            called if the file has to be uploaded.
+        :returns: Dictionary with the lists of ``added``, ``updated``,
+            ``deleted`` and ``unchanged`` keys, and of ``renamed``
+            ``(old_key, new_key)`` pairs.
+        """
+        bucket = self.bucket
+        # Head objects, and delete markers which are heads of deleted keys.
+        heads = {}
+        markers = {}
+        for obj in (
+            ObjectVersion.query.outerjoin(
+                FileInstance, FileInstance.id == ObjectVersion.file_id
+            )
+            .options(contains_eager(ObjectVersion.file))
+            .filter(
+                ObjectVersion.bucket_id == bucket.id,
+                ObjectVersion.is_head.is_(True),
+            )
+        ):
+            (heads if obj.file_id is not None else markers)[obj.key] = obj
+        # Objects which can be renamed, by content.
+        removed = {}
+        for key, obj in heads.items():
+            if key not in manifest:
+                removed.setdefault((obj.file.checksum, obj.file.size), []).append(obj)
+
+        summary = {
+            "added": [],
+            "updated": [],
+            "renamed": [],
+            "deleted": [],
+            "unchanged": [],
+        }
+        with db.session.begin_nested():
+            for key, entry in manifest.items():
+                head = heads.get(key)
+                content = (entry["checksum"], entry["size"])
+                if head is not None and (head.file.checksum, head.file.size) == content:
+                    summary["unchanged"].append(key)
+                elif head is None and removed.get(content):
+                    source = removed[content].pop()
+                    obj = _new_version(
+                        bucket, key, head=markers.get(key), fileinstance=source.file
+                    )
+                    data = self.filesmap.pop(source.key, {})
+                    _new_version(bucket, source.key, head=source)
+                    self.filesmap[key] = self.file_cls(obj, data).dumps()
+                    summary["renamed"].append((source.key, key))
+                else:
+                    stream = entry["stream"]
+                    if callable(stream):
+                        stream = stream()
+                    obj, data = self._store(key, stream)
+                    self.filesmap[key] = self.file_cls(obj, data).dumps()
+                    summary["updated" if head is not None else "added"].append(key)
+
+            for objs in removed.values():
+                for obj in objs:
+                    _new_version(bucket, obj.key, head=obj)
+                    self.filesmap.pop(obj.key, None)
+                    summary["deleted"].append(obj.key)
+            self.flush()
+        self._changed(
+            summary["added"]
+            + summary["updated"]
+            + summary["deleted"]
+            + [key for renamed in summary["renamed"] for key in renamed]
+        )
+        return summary
+
+    @_writable
+    def upload_multipart(
+        self, key, path, chunk_size=None, workers=None, upload_id=None
+    ):
+        """Upload a large local file as a multipart object, in parallel.
+
+        The parts are written by a pool of threads at their position in the
+        file of a :class:`~invenio_files_rest.models.MultipartObject`, while
+        one more thread computes the checksum of the whole file. Every
+        uploaded part is committed, so that an interrupted upload is resumed
+        by calling this method again: the uncompleted multipart object of the
+        key with the same size and chunk size (or the one of ``upload_id``)
+        is reused, and only its missing parts, and the parts whose checksum
+        does not match the local file anymore, are uploaded.
+
+        As the session is committed (with any pending change), the method
+        must run in its own transaction and cannot be called in a nested one.
+
+        Files not larger than ``FILES_REST_MULTIPART_CHUNKSIZE_MIN`` are
+        added as a single stream.
+
+        :param key: The file key.
+        :param path: Path of the local file.
+        :param chunk_size: Size of the parts. (Default:
+            :data:`invenio_records_files.config.RECORDS_FILES_MULTIPART_CHUNK_SIZE`)
+        :param workers: Maximum number of threads. (Default: the
+            :class:`~concurrent.futures.ThreadPoolExecutor` default)
+        :param upload_id: Upload id of the multipart object to resume.
+        :returns: The created :class:`~invenio_files_rest.models.ObjectVersion`.
+        """
+        config = current_app.config
+        bucket = self.bucket
+        size = os.path.getsize(path)
+        if size <= config["FILES_REST_MULTIPART_CHUNKSIZE_MIN"]:
+            self[key] = path
+            return self[key].obj
+        if db.session().in_nested_transaction():
+            raise InvalidOperationError(
+                description="Multipart uploads cannot run in a nested transaction."
+            )
+        if not chunk_size:
+            chunk_size = max(
+                config["RECORDS_FILES_MULTIPART_CHUNK_SIZE"],
+                -(-size // config["FILES_REST_MULTIPART_MAX_PARTS"]),
+            )
+
+        if upload_id is not None:
+            mp = MultipartObject.get(bucket, key, upload_id)
+            if mp is None:
+                raise InvalidOperationError(description="Unknown upload id.")
+            if mp.size != size:
+                raise InvalidOperationError(
+                    description="The size of the upload does not match the file."
+                )
+        else:
+            mp = (
+                MultipartObject.query_by_bucket(bucket)
+                .filter_by(key=key, size=size, chunk_size=chunk_size, completed=False)
+                .first()
+            )
+            if mp is None:
+                mp = MultipartObject.create(bucket, key, size, chunk_size)
+                db.session.commit()
+        uploaded = {part.part_number: part for part in Part.query_by_multipart(mp)}
+
+        app = current_app._get_current_object()
+        storage = mp.file.storage()
+        algorithms = config.get("RECORDS_FILES_EXTRA_CHECKSUMS")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashing = executor.submit(_hash_file, app, storage, path, algorithms)
+            parts = {}
+            for part_number in range(mp.last_part_number + 1):
+                offset = part_number * mp.chunk_size
+                part = uploaded.get(part_number)
+                future = executor.submit(
+                    _resume_part,
+                    app,
+                    storage,
+                    path,
+                    offset,
+                    min(mp.chunk_size, size - offset),
+                    part.checksum if part is not None else None,
+                )
+                parts[future] = part_number
+            # On failure, the parts not started yet are cancelled but the ones
+            # already uploaded are still recorded, so that a resumed upload
+            # does not send them again.
+            error = None
+            for future in as_completed(parts):
+                try:
+                    part_checksum = future.result()
+                except Exception as exc:
+                    if error is None:
+                        error = exc
+                        for pending in parts:
+                            pending.cancel()
+                        hashing.cancel()
+                    continue
+                if part_checksum is None:
+                    continue
+                part = uploaded.get(parts[future])
+                if part is not None:
+                    part.checksum = part_checksum
+                else:
+                    db.session.add(
+                        Part(
+                            multipart=mp,
+                            part_number=parts[future],
+                            checksum=part_checksum,
+                        )
+                    )
+                db.session.commit()
+            if error is not None:
+                raise error
+            checksum, checksums = hashing.result()
+
+        with db.session.begin_nested():
+            mp.complete()
+            mp.file.checksum = checksum
+            obj = ObjectVersion.create(bucket, key, _file_id=mp.file_id)
+            mp.delete()
+            data = {"checksums": checksums} if algorithms else {}
+            self.filesmap[key] = self.file_cls(obj, data).dumps()
+            self.flush()
+        self._changed([key])
+        return obj
+
     def sort_by(self, *ids):
         """Update files order.
 
@@ -214,21 +963,69 @@ class FilesIterator(object):
 
         # Delete old key
         self.filesmap[new_key] = self.file_cls(obj, old_data).dumps()
-        del self[old_key]
+        self._delete(old_key)
+        self._changed([old_key, new_key])
 
         return obj
 
-    def dumps(self, bucket=None):
+    def verify(self, workers=None):
+        """Verify the checksums of the files.
+
+        Every file is read again through its storage backend, in a pool of
+        threads, and its checksum is compared to the one of the file instance
+        and to the one stored in the record metadata.
+
+        :param workers: Maximum number of threads. (Default: the
+            :class:`~concurrent.futures.ThreadPoolExecutor` default)
+        :returns: List of dictionaries, one per file, with the ``key``,
+            ``file_id``, ``checksum`` of the file instance, ``expected``
+            checksum from the record metadata, ``computed`` checksum, the
+            ``error`` message if the file could not be read and whether the
+            file is ``valid``.
+        """
+        report = []
+        storages = []
+        for file_ in self:
+            fileinstance = file_.obj.file
+            report.append(
+                {
+                    "key": file_.key,
+                    "file_id": str(fileinstance.id),
+                    "checksum": fileinstance.checksum,
+                    "expected": file_.data.get("checksum"),
+                }
+            )
+            storages.append(fileinstance.storage())
+
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda s: _compute_checksum(app, s), storages)
+            for item, (computed, error) in zip(report, results):
+                item["computed"] = computed
+                item["error"] = error
+                item["valid"] = (
+                    computed is not None
+                    and computed == item["checksum"]
+                    and item["expected"] in (None, computed)
+                )
+        return report
+
+    def dumps(self, bucket=None, objects=None):
         """Serialize files from a bucket.
 
         :param bucket: Instance of files
             :class:`invenio_files_rest.models.Bucket`. (Default:
             ``self.bucket``)
+        :param objects: Head objects of the bucket, if already fetched.
         :returns: List of serialized files.
         """
+        if bucket is None and objects is None:
+            objects = self._objects
         return [
             self.file_cls(o, self.filesmap.get(o.key, {})).dumps()
-            for o in sorted_files_from_bucket(bucket or self.bucket, self.keys)
+            for o in sorted_files_from_bucket(
+                bucket or self.bucket, self.keys, objects=objects
+            )
         ]
 
 
@@ -260,14 +1057,74 @@ class FilesMixin(object):
         if self.model is None:
             raise MissingModelError()
 
-        records_buckets = RecordsBuckets.query.filter_by(record_id=self.id).first()
+        prefetched = getattr(self, "_files_prefetched", None)
+        if prefetched is not None:
+            records_buckets, objects = prefetched
+        else:
+            records_buckets = RecordsBuckets.query.filter_by(record_id=self.id).first()
+            objects = None
 
         if not records_buckets:
             return None
         else:
             bucket = records_buckets.bucket
+        # Keep the object (and its decompressed manifest) in the session.
+        self._records_buckets = records_buckets
+
+        files = self.files_iter_cls(
+            self,
+            bucket=bucket,
+            file_cls=self.file_cls,
+            records_buckets=records_buckets,
+            objects=objects,
+        )
+        return files
+
+    @classmethod
+    def prefetch_files(cls, records):
+        """Load the files of many records at once.
 
-        return self.files_iter_cls(self, bucket=bucket, file_cls=self.file_cls)
+        The buckets and the head objects with their file instances are
+        fetched in two queries for all the records, and are then used by the
+        files iterators of the records (e.g. to serialize or index them)
+        instead of querying the database again, until their files change.
+
+        :param records: List of records.
+        :returns: The list of records.
+        """
+        records = [record for record in records if record.model is not None]
+        if not records:
+            return records
+
+        rows = {
+            rb.record_id: rb
+            for rb in RecordsBuckets.query.options(joinedload(RecordsBuckets.bucket))
+            .filter(RecordsBuckets.record_id.in_([record.id for record in records]))
+            .all()
+        }
+        objects = {rb.bucket_id: [] for rb in rows.values()}
+        if objects:
+            for obj in (
+                ObjectVersion.query.join(
+                    FileInstance, FileInstance.id == ObjectVersion.file_id
+                )
+                .options(contains_eager(ObjectVersion.file))
+                .filter(
+                    ObjectVersion.bucket_id.in_(list(objects)),
+                    ObjectVersion.is_head.is_(True),
+                )
+            ):
+                objects[obj.bucket_id].append(obj)
+
+        for record in records:
+            records_buckets = rows.get(record.id)
+            record._files_prefetched = (
+                records_buckets,
+                objects[records_buckets.bucket_id] if records_buckets else None,
+            )
+            if records_buckets is not None and hasattr(record, "_bucket"):
+                record._bucket = records_buckets.bucket
+        return records
 
     @files.setter
     def files(self, data):
@@ -371,15 +1228,162 @@ class Record(_Record, FilesMixin):
                 self._bucket = Bucket.get(self.bucket_id)
         return self._bucket
 
-    def delete(self, force=False):
+    def clone_files_from(self, record):
+        """Snapshot the files of another record into the bucket of this record.
+
+        The new objects point to the file instances of the objects of the
+        source record, so no file is copied. The objects and their tags are
+        copied in bulk, with a constant number of queries. The ``_files`` of
+        this record list all the copied objects, in the order of the files of
+        the source record and with their custom data.
+
+        :param record: The record to copy the files from.
+        :raises invenio_files_rest.errors.InvalidOperationError: If the bucket
+            of this record is locked, deleted or not empty.
+        :raises invenio_files_rest.errors.FileSizeError: If the files exceed
+            the quota of the bucket of this record.
+        """
+        bucket = self.bucket
+        if (
+            bucket.locked
+            or bucket.deleted
+            or ObjectVersion.get_by_bucket(bucket).first() is not None
+        ):
+            raise InvalidOperationError()
+
+        heads = (
+            ObjectVersion.bucket_id == record.bucket_id,
+            ObjectVersion.is_head.is_(True),
+            ObjectVersion.file_id.isnot(None),
+        )
+        sources = (
+            db.session.query(
+                ObjectVersion.key,
+                FileInstance.id,
+                FileInstance.checksum,
+                FileInstance.size,
+            )
+            .join(FileInstance, FileInstance.id == ObjectVersion.file_id)
+            .filter(*heads)
+            .all()
+        )
+        size = sum(row.size or 0 for row in sources)
+        quota_left = bucket.quota_left
+        if quota_left is not None and size > quota_left:
+            raise FileSizeError(description="Bucket quota exceeded.")
+
+        with db.session.begin_nested():
+            versions = ObjectVersion.copy_from(record.bucket_id, bucket.id)
+            version_ids = {v["key"]: v["version_id"] for v in versions}
+
+            tags = [
+                {"version_id": version_ids[obj_key], "key": key, "value": value}
+                for obj_key, key, value in db.session.query(
+                    ObjectVersion.key, ObjectVersionTag.key, ObjectVersionTag.value
+                )
+                .join(
+                    ObjectVersionTag,
+                    ObjectVersionTag.version_id == ObjectVersion.version_id,
+                )
+                .filter(*heads)
+            ]
+            if tags:
+                db.session.execute(insert(ObjectVersionTag), tags)
+
+            bucket.size += size
+
+        source_files = record.files
+        source = source_files.filesmap if source_files is not None else {}
+        order = {key: index for index, key in enumerate(source)}
+        files = self.files
+        files.filesmap = OrderedDict(
+            (
+                key,
+                dict(
+                    source.get(key, {}),
+                    bucket=str(bucket.id),
+                    checksum=checksum,
+                    file_id=str(file_id),
+                    key=key,
+                    size=file_size,
+                    version_id=str(version_ids[key]),
+                ),
+            )
+            for key, file_id, checksum, file_size in sorted(
+                sources, key=lambda row: (order.get(row.key, len(order)), row.key)
+            )
+        )
+        files._write(list(files.filesmap.values()))
+
+    def commit(self, *args, **kwargs):
+        """Store changes of the record in the database.
+
+        The files remembered to be merged (see
+        :meth:`~invenio_records_files.api.FilesIterator.begin_merge`) are
+        remembered again from the committed record.
+        """
+        record = super(Record, self).commit(*args, **kwargs)
+        if getattr(self, "_files_baseline", None) is not None:
+            files = self.files
+            if files is not None:
+                files._set_baseline()
+        return record
+
+    def delete(self, force=False, mark_bucket=False):
         """Delete a record and also remove the RecordsBuckets if necessary.
 
         :param force: True to remove also the
             :class:`~invenio_records_files.models.RecordsBuckets` object.
+        :param mark_bucket: Mark the bucket of the record as deleted, see
+            :func:`invenio_records_files.orphans.collect_orphaned_buckets`.
         :returns: Deleted record.
         """
+        if mark_bucket and self.bucket is not None:
+            self.bucket.deleted = True
         if force:
-            RecordsBuckets.query.filter_by(
-                record=self.model, bucket=self.files.bucket
-            ).delete()
+            RecordsBuckets.query.filter_by(record_id=self.id).delete()
+        invalidate_permission_cache(self.bucket_id)
         return super(Record, self).delete(force)
+
+    @classmethod
+    def delete_many(cls, records, force=False, lock_buckets=False, mark_buckets=False):
+        """Delete many records at once.
+
+        The links to the buckets of all the records are removed in one query
+        (with ``force``), and so are the buckets locked or marked, before the
+        records are deleted.
+
+        :param records: List of records.
+        :param force: True to remove also the
+            :class:`~invenio_records_files.models.RecordsBuckets` objects.
+        :param lock_buckets: Lock the buckets of the records.
+        :param mark_buckets: Mark the buckets of the records as deleted, see
+            :func:`invenio_records_files.orphans.collect_orphaned_buckets`.
+        :returns: The deleted records.
+        """
+        records = list(records)
+        if not records:
+            return records
+        record_ids = [record.id for record in records]
+        with db.session.begin_nested():
+            values = {}
+            if lock_buckets:
+                values[Bucket.locked] = True
+            if mark_buckets:
+                values[Bucket.deleted] = True
+            if values:
+                bucket_ids = [
+                    row[0]
+                    for row in db.session.query(RecordsBuckets.bucket_id).filter(
+                        RecordsBuckets.record_id.in_(record_ids)
+                    )
+                ]
+                Bucket.query.filter(Bucket.id.in_(bucket_ids)).update(values)
+            if force:
+                RecordsBuckets.query.filter(
+                    RecordsBuckets.record_id.in_(record_ids)
+                ).delete(synchronize_session=False)
+            for record in records:
+                invalidate_permission_cache(record.bucket_id)
+                super(Record, record).delete(force)
+        return records
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Streaming archives of the files of a record.
+
+The archives are generated on the fly while the files are read from their
+storage backend: only one chunk is kept in memory at a time and no temporary
+file is written. The size of each member is taken from its
+:class:`~invenio_files_rest.models.FileInstance`, so no pre-scan of the files
+is needed (e.g. to decide if a ZIP member requires ZIP64 extensions).
+"""
+
+import tarfile
+import zipfile
+from calendar import timegm
+
+from invenio_files_rest.helpers import chunk_size_or_default
+
+ARCHIVE_MIMETYPES = {
+    "tar": "application/x-tar",
+    "zip": "application/zip",
+}
+"""MIME types of the supported archive formats."""
+
+
+class _ArchiveBuffer(object):
+    """Write-only file-like object drained by the archive generator.
+
+    It does not implement ``seek()``, so that :class:`zipfile.ZipFile` writes
+    data descriptors instead of going back to patch the local headers.
+    """
+
+    def __init__(self):
+        """Initialize the buffer."""
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        """Append data to the buffer."""
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        """Get the number of bytes written so far."""
+        return self._offset
+
+    def flush(self):
+        """Nothing to flush, data is drained by the generator."""
+
+    def drain(self):
+        """Get and forget the data written since the last call."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _read_chunks(obj, chunk_size):
+    """Iterate over the content of an object version."""
+    fp = obj.file.storage().open(mode="rb")
+    try:
+        while 1:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fp.close()
+
+
+def zip_stream(objects, chunk_size=None):
+    """Generate a ZIP archive of object versions.
+
+    Members are stored without compression and ZIP64 extensions are used for
+    members (and archives) bigger than 4 GiB.
+
+    :param objects: Iterable of
+        :class:`~invenio_files_rest.models.ObjectVersion` instances.
+    :param chunk_size: Size of the chunks read from the storage.
+    :returns: Iterator over the chunks of the archive.
+    """
+    chunk_size = chunk_size_or_default(chunk_size)
+    buf = _ArchiveBuffer()
+    with zipfile.ZipFile(buf, mode="w", allowZip64=True) as archive:
+        for obj in objects:
+            info = zipfile.ZipInfo(obj.key, date_time=obj.file.updated.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.external_attr = 0o644 << 16
+            # The known size tells zipfile if the member needs ZIP64.
+            info.file_size = obj.file.size
+            with archive.open(info, mode="w") as member:
+                for chunk in _read_chunks(obj, chunk_size):
+                    member.write(chunk)
+                    yield buf.drain()
+            yield buf.drain()
+    yield buf.drain()
+
+
+def tar_stream(objects, chunk_size=None):
+    """Generate a TAR (POSIX.1-2001) archive of object versions.
+
+    :param objects: Iterable of
+        :class:`~invenio_files_rest.models.ObjectVersion` instances.
+    :param chunk_size: Size of the chunks read from the storage.
+    :returns: Iterator over the chunks of the archive.
+    """
+    chunk_size = chunk_size_or_default(chunk_size)
+    offset = 0
+    for obj in objects:
+        info = tarfile.TarInfo(obj.key)
+        info.size = obj.file.size
+        info.mtime = timegm(obj.file.updated.timetuple())
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        offset += len(header)
+        yield header
+
+        written = 0
+        for chunk in _read_chunks(obj, chunk_size):
+            written += len(chunk)
+            yield chunk
+        if written != info.size:
+            raise IOError("Size of {0} changed while archiving.".format(obj.key))
+
+        remainder = written % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+            written += tarfile.BLOCKSIZE - remainder
+        offset += written
+
+    # End-of-archive marker, padded to a full record.
+    offset += 2 * tarfile.BLOCKSIZE
+    remainder = offset % tarfile.RECORDSIZE
+    padding = tarfile.RECORDSIZE - remainder if remainder else 0
+    yield tarfile.NUL * (2 * tarfile.BLOCKSIZE + padding)
+
+
+archive_factories = {
+    "tar": tar_stream,
+    "zip": zip_stream,
+}
+"""Archive generators by format."""
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Click command-line interface for record files management."""
+
+import time
+import uuid
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from .fixity import audit_files
+from .orphans import collect_orphaned_buckets
+from .rebuild import rebuild_files
+from .reconcile import reconcile_files
+
+
+@click.group()
+def records_files():
+    """Record files management commands."""
+
+
+@records_files.command()
+@click.option(
+    "--chunk-size", default=1000, show_default=True, help="Records per query."
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Number of worker processes (default: number of CPUs, 0: no pool).",
+)
+@click.option("--max-rate", type=int, default=None, help="Maximum bytes per second.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="File used to save and resume the progress of the audit.",
+)
+@click.option(
+    "--update-last-check/--no-update-last-check",
+    default=True,
+    show_default=True,
+    help="Store the results on the file instances.",
+)
+@with_appcontext
+def audit(chunk_size, workers, max_rate, checkpoint, update_last_check):
+    """Verify the checksums of the files of all records."""
+    checked = failed = 0
+    for result in audit_files(
+        chunk_size=chunk_size,
+        workers=workers,
+        max_rate=max_rate,
+        checkpoint=checkpoint,
+        update_last_check=update_last_check,
+    ):
+        checked += 1
+        if result["computed"] != result["checksum"]:
+            failed += 1
+            click.secho(
+                "{record_id} {key} {file_id}: expected {checksum}, got {0}".format(
+                    result["error"] or result["computed"], **result
+                ),
+                fg="red",
+            )
+    click.secho(
+        "Checked {0} files, {1} failed.".format(checked, failed),
+        fg="red" if failed else "green",
+    )
+    if failed:
+        raise click.exceptions.Exit(1)
+
+
+@records_files.command()
+@click.option(
+    "--chunk-size", default=1000, show_default=True, help="Records per query."
+)
+@click.option(
+    "--repair", is_flag=True, default=False, help="Rewrite the mismatched _files."
+)
+@click.option("--max-rate", type=int, default=None, help="Maximum records per second.")
+@click.option("--after", default=None, help="Only check records after this id.")
+@with_appcontext
+def reconcile(chunk_size, repair, max_rate, after):
+    """Compare the _files of all records with their buckets."""
+    mismatched = 0
+    for result in reconcile_files(
+        chunk_size=chunk_size,
+        repair=repair,
+        max_rate=max_rate,
+        after=uuid.UUID(after) if after else None,
+    ):
+        mismatched += 1
+        click.secho(
+            "{0}: missing {1}, extra {2}, changed {3}{4}".format(
+                result["record_id"],
+                ", ".join(result["missing"]) or "-",
+                ", ".join(result["extra"]) or "-",
+                ", ".join(result["changed"]) or "-",
+                " (repaired)" if result["repaired"] else "",
+            ),
+            fg="yellow" if result["repaired"] else "red",
+        )
+    click.secho(
+        "{0} records mismatched{1}.".format(
+            mismatched, ", repaired" if repair and mismatched else ""
+        ),
+        fg="red" if mismatched and not repair else "green",
+    )
+    if mismatched and not repair:
+        raise click.exceptions.Exit(1)
+
+
+@records_files.command()
+@click.option(
+    "--chunk-size", default=1000, show_default=True, help="Records per worker task."
+)
+@click.option(
+    "--batch-size", default=100, show_default=True, help="Records per commit."
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=int,
+    default=None,
+    help="Number of worker processes (default: number of CPUs, 0: no pool).",
+)
+@with_appcontext
+def rebuild(chunk_size, batch_size, workers):
+    """Rebuild the _files of all records from their buckets."""
+    start = time.monotonic()
+    rebuilt = 0
+    for count in rebuild_files(
+        chunk_size=chunk_size, batch_size=batch_size, workers=workers
+    ):
+        rebuilt += count
+        elapsed = time.monotonic() - start
+        click.echo(
+            "Rebuilt {0} records ({1:.1f} records/s).".format(
+                rebuilt, rebuilt / elapsed if elapsed else 0.0
+            )
+        )
+    click.secho("Rebuilt {0} records.".format(rebuilt), fg="green")
+
+
+@records_files.command()
+@click.option(
+    "--chunk-size", default=1000, show_default=True, help="Buckets per transaction."
+)
+@click.option(
+    "--mark",
+    "action",
+    flag_value="mark",
+    help="Mark the orphaned buckets as deleted.",
+)
+@click.option(
+    "--remove",
+    "action",
+    flag_value="remove",
+    help="Permanently remove the orphaned buckets and their files.",
+)
+@click.option(
+    "--deleted-records",
+    is_flag=True,
+    default=False,
+    help="Also collect the buckets of soft-deleted records.",
+)
+@click.option(
+    "--unlinked",
+    is_flag=True,
+    default=False,
+    help="Also collect the buckets never linked to a record or not marked as "
+    "deleted, which may belong to other modules.",
+)
+@click.option(
+    "--older-than",
+    type=float,
+    default=1,
+    show_default=True,
+    help="Only collect buckets not updated for this number of days.",
+)
+@click.option("--max-rate", type=int, default=None, help="Maximum buckets per second.")
+@with_appcontext
+def gc(chunk_size, action, deleted_records, unlinked, older_than, max_rate):
+    """Collect the buckets of deleted records (dry run by default)."""
+    action = action or "report"
+    buckets = files_count = size = 0
+    for result in collect_orphaned_buckets(
+        chunk_size=chunk_size,
+        action=action,
+        include_deleted_records=deleted_records,
+        include_unlinked=unlinked,
+        older_than=timedelta(days=older_than),
+        max_rate=max_rate,
+    ):
+        buckets += 1
+        files_count += result["files"]
+        size += result["size"]
+        click.echo(
+            "{bucket_id} (record {0}): {files} files, {size} bytes".format(
+                result["record_id"] or "-", **result
+            )
+        )
+    click.secho(
+        "{0} {1} orphaned buckets, {2} files, {3} bytes.".format(
+            {"report": "Found", "mark": "Marked", "remove": "Removed"}[action],
+            buckets,
+            files_count,
+            size,
+        ),
+        fg="green",
+    )
@@ -45,3 +45,108 @@ An example of this configuration is provided in the
 `Integration with Invenio REST API
 <usage.html#integration-with-invenio-rest-api>`_ section of the documentation.
 """
+
+RECORDS_FILES_PERMISSION_CACHE_TTL = None
+"""Number of seconds granted file download permissions are cached.
+
+When set, :func:`invenio_records_files.utils.file_download_ui` remembers the
+permissions granted to an identity on a bucket for this amount of seconds,
+instead of running the permission factory on every download. Cached decisions
+are dropped when the bucket is locked or the record is deleted. The hit rate
+is available in ``app.extensions['invenio-records-files']
+.permission_cache.stats``.
+
+By default (``None``) permissions are checked on every download.
+"""
+
+RECORDS_FILES_PERMISSION_CACHE_MAXSIZE = 10000
+"""Maximum number of permission decisions kept in the cache."""
+
+RECORDS_FILES_SIGNED_URL_ROUTE = None
+"""Route of the signed download URLs.
+
+See :func:`invenio_records_files.signing.sign_object_url`. The downloads of
+this route are not checked by the permission factory, so it is only
+registered when set, e.g. to ``"/signed-files/<bucket_id>/<path:key>"``.
+"""
+
+RECORDS_FILES_SIGNED_URL_EXPIRES = 300
+"""Default validity (in seconds) of the signed download URLs."""
+
+RECORDS_FILES_EXTRA_CHECKSUMS = []
+"""Additional checksums computed when a file is added to a record.
+
+List of algorithm names, e.g. ``['sha256', 'blake2b', 'xxh64']``. The
+checksums are computed in the same pass that reads the stream to store it,
+each algorithm in its own thread, and are stored in the ``checksums`` key of
+the file metadata (e.g. ``{'sha256': 'sha256:...'}``). Algorithms starting
+with ``xxh`` are only computed if the ``xxhash`` package is installed.
+"""
+
+RECORDS_FILES_DEDUPLICATE = False
+"""Link identical files added to records to the same file instance.
+
+When enabled, a file added to a record whose checksum and size match an
+existing readable file instance is linked to that instance, once their bytes
+have been compared, and the bytes which have just been stored are discarded.
+The lookup filters file instances on their checksum, so an index on
+``files_files.checksum`` is recommended.
+"""
+
+RECORDS_FILES_MULTIPART_CHUNK_SIZE = 100 * 1024 * 1024  # 100 MiB
+"""Default size of the parts of the multipart uploads of local files.
+
+See :meth:`invenio_records_files.api.FilesIterator.upload_multipart`. The
+size is increased for files which would otherwise need more parts than
+``FILES_REST_MULTIPART_MAX_PARTS``.
+"""
+
+RECORDS_FILES_MANIFEST_INLINE_LIMIT = None
+"""Maximum number of files listed in the ``_files`` key of the records.
+
+When set, the full list of files of a record is stored compressed in the
+``manifest`` column of :class:`invenio_records_files.models.RecordsBuckets`
+and ``_files`` only keeps its first entries, which keeps the record JSON (and
+its revisions and indexed documents) small for records with many files.
+:class:`invenio_records_files.api.FilesIterator` reads the manifest
+transparently. By default (``None``) all the files are listed in ``_files``.
+"""
+
+RECORDS_FILES_DEFERRED_FLUSH = False
+"""Write the ``_files`` of the records when the transaction is committed.
+
+By default, every change of the files of a record rewrites ``_files``. When
+enabled, the changed records are only marked, and ``_files`` is computed
+once per record before the transaction is committed, from one query for all
+the records changed in the transaction. In the meantime, ``_files`` in the
+record metadata is not up to date.
+"""
+
+RECORDS_FILES_INDEX_FILES = False
+"""Refresh the ``_files`` of the indexed records from their bucket.
+
+When enabled (and Invenio-Indexer is installed),
+:func:`invenio_records_files.indexer.index_files` is connected to the
+``before_record_index`` signal. For bulk indexing, prefer
+:class:`invenio_records_files.indexer.FilesRecordIndexer`, which loads the
+files of many records at once.
+"""
+
+RECORDS_FILES_INDEXER_CHUNK_SIZE = 500
+"""Number of records loaded at once by the bulk files record indexer."""
+
+RECORDS_FILES_REINDEX_DELAY = None
+"""Reindex the records whose files changed, after this number of seconds.
+
+When set, the records whose files are changed through
+:class:`invenio_records_files.api.FilesIterator` are sent to the bulk
+indexing queue once their files have not changed for this number of seconds,
+see :class:`invenio_records_files.reindex.ReindexQueue`. By default
+(``None``), the records are not reindexed.
+"""
+
+RECORDS_FILES_REINDEX_MAX_DELAY = 60
+"""Maximum number of seconds before a record whose files changed is reindexed."""
+
+RECORDS_FILES_REINDEX_BATCH_SIZE = 500
+"""Maximum number of records sent to the bulk indexing queue at once."""
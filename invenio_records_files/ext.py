@@ -10,8 +10,18 @@
 
 from __future__ import absolute_import, print_function
 
+import atexit
+
+from invenio_db import db
+from sqlalchemy import event
+
 from invenio_records_files import config
 
+from .api import discard_dirty_files, write_dirty_files
+from .permissions import PermissionCache
+from .reindex import ReindexQueue, discard_reindex, enqueue_reindex, queue_reindex
+from .signals import record_files_changed
+
 
 class InvenioRecordsFiles(object):
     """Invenio-Records-Files extension."""
@@ -24,8 +34,48 @@ class InvenioRecordsFiles(object):
     def init_app(self, app):
         """Flask application initialization."""
         self.init_config(app)
+        self.permission_cache = None
+        if app.config["RECORDS_FILES_PERMISSION_CACHE_TTL"]:
+            self.permission_cache = PermissionCache(
+                app.config["RECORDS_FILES_PERMISSION_CACHE_TTL"],
+                maxsize=app.config["RECORDS_FILES_PERMISSION_CACHE_MAXSIZE"],
+            )
+        if not event.contains(db.session, "before_commit", write_dirty_files):
+            event.listen(db.session, "before_commit", write_dirty_files)
+            event.listen(db.session, "after_transaction_end", discard_dirty_files)
+        if app.config["RECORDS_FILES_INDEX_FILES"]:
+            self.init_indexer()
+        self.reindex_queue = None
+        if app.config["RECORDS_FILES_REINDEX_DELAY"] is not None:
+            self.init_reindex_queue(app)
         app.extensions["invenio-records-files"] = self
 
+    def init_indexer(self):
+        """Connect the indexing of the files of the records."""
+        try:
+            from invenio_indexer.signals import before_record_index
+
+            from .indexer import index_files
+        except ImportError:  # pragma: no cover
+            return
+        before_record_index.connect(index_files)
+
+    def init_reindex_queue(self, app):
+        """Reindex the records whose files changed."""
+        self.reindex_queue = ReindexQueue(
+            app,
+            delay=app.config["RECORDS_FILES_REINDEX_DELAY"],
+            max_delay=app.config["RECORDS_FILES_REINDEX_MAX_DELAY"],
+            batch_size=app.config["RECORDS_FILES_REINDEX_BATCH_SIZE"],
+        )
+        # Index the queued records when the process exits (e.g. when a worker
+        # is recycled), instead of losing them with the worker thread.
+        atexit.register(self.reindex_queue.stop)
+        record_files_changed.connect(queue_reindex)
+        if not event.contains(db.session, "after_commit", enqueue_reindex):
+            event.listen(db.session, "after_commit", enqueue_reindex)
+            event.listen(db.session, "after_transaction_end", discard_reindex)
+
     def init_config(self, app):
         """Initialize configuration."""
         for k in dir(config):
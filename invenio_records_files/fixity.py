@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Repository-wide fixity audit of record files.
+
+The audit walks all records with a bucket, in chunks ordered by record id,
+and recomputes the checksums of their files in a pool of processes. The last
+record id of every completed chunk can be saved in a checkpoint file, so that
+an interrupted audit resumes where it stopped.
+"""
+
+import json
+import multiprocessing
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from flask import current_app
+from invenio_db import db
+from invenio_files_rest.models import FileInstance, ObjectVersion
+
+from .utils import Throttle, init_worker, iter_records_buckets
+
+
+def _file_checksum(task):
+    """Recompute the checksum of a file.
+
+    The file instance is rebuilt from plain values, so that the worker does
+    not need a database connection.
+    """
+    fileinstance = FileInstance(
+        id=task["file_id"],
+        uri=task["uri"],
+        size=task["size"],
+        checksum=task["checksum"],
+        storage_class=task["storage_class"],
+        updated=task["updated"],
+    )
+    try:
+        return dict(task, computed=fileinstance.storage().checksum(), error=None)
+    except Exception as exc:
+        return dict(task, computed=None, error=str(exc))
+
+
+def _chunk_tasks(records_buckets):
+    """Get the files of the head objects of a chunk of records buckets."""
+    records = {rb.bucket_id: rb.record_id for rb in records_buckets}
+    rows = (
+        db.session.query(ObjectVersion.bucket_id, ObjectVersion.key, FileInstance)
+        .join(FileInstance, FileInstance.id == ObjectVersion.file_id)
+        .filter(
+            ObjectVersion.bucket_id.in_(list(records)),
+            ObjectVersion.is_head.is_(True),
+        )
+        .order_by(ObjectVersion.bucket_id, ObjectVersion.key)
+    )
+    return [
+        {
+            "record_id": str(records[bucket_id]),
+            "key": key,
+            "file_id": str(fileinstance.id),
+            "uri": fileinstance.uri,
+            "size": fileinstance.size,
+            "checksum": fileinstance.checksum,
+            "storage_class": fileinstance.storage_class,
+            "updated": fileinstance.updated,
+        }
+        for bucket_id, key, fileinstance in rows
+    ]
+
+
+def _read_checkpoint(path):
+    """Read the last audited record id from a checkpoint file."""
+    if path and os.path.exists(path):
+        with open(path) as fp:
+            return uuid.UUID(json.load(fp)["after"])
+    return None
+
+
+def _write_checkpoint(path, after):
+    """Atomically write the last audited record id to a checkpoint file."""
+    tmp_path = "{0}.tmp".format(path)
+    with open(tmp_path, "w") as fp:
+        json.dump({"after": str(after)}, fp)
+    os.replace(tmp_path, path)
+
+
+def _update_last_check(results):
+    """Store the results of the audit on the file instances."""
+    outcomes = {}
+    for result in results:
+        outcome = (
+            None
+            if result["computed"] is None
+            else result["computed"] == result["checksum"]
+        )
+        outcomes.setdefault(outcome, []).append(result["file_id"])
+
+    now = datetime.now(tz=timezone.utc)
+    with db.session.begin_nested():
+        for outcome, file_ids in outcomes.items():
+            db.session.query(FileInstance).filter(FileInstance.id.in_(file_ids)).update(
+                {FileInstance.last_check: outcome, FileInstance.last_check_at: now},
+                synchronize_session=False,
+            )
+    db.session.commit()
+
+
+def audit_files(
+    chunk_size=1000,
+    workers=None,
+    max_rate=None,
+    checkpoint=None,
+    update_last_check=True,
+):
+    """Recompute the checksums of the files of all the records.
+
+    :param chunk_size: Number of records fetched per query.
+    :param workers: Number of worker processes. ``0`` computes the checksums
+        in the current process. (Default: number of CPUs)
+    :param max_rate: Maximum number of bytes read per second.
+    :param checkpoint: Path of the checkpoint file. If it exists, the audit
+        resumes after the last record it contains.
+    :param update_last_check: Store the result of the checks in
+        ``FileInstance.last_check`` and ``FileInstance.last_check_at``.
+    :returns: Iterator over the results, one dictionary per file with the
+        ``record_id``, ``key``, ``file_id``, stored ``checksum``, ``computed``
+        checksum and ``error`` message (if the file could not be read).
+    """
+    throttle = Throttle(max_rate)
+    after = _read_checkpoint(checkpoint)
+    executor = None
+    if workers != 0:
+        workers = workers or os.cpu_count() or 1
+        max_pending = 2 * workers
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_worker,
+            initargs=(current_app._get_current_object(),),
+        )
+
+    try:
+        for records_buckets in iter_records_buckets(chunk_size, after=after):
+            results = []
+            if executor is None:
+                for task in _chunk_tasks(records_buckets):
+                    throttle(task["size"])
+                    results.append(_file_checksum(task))
+            else:
+                pending = deque()
+                for task in _chunk_tasks(records_buckets):
+                    throttle(task["size"])
+                    pending.append(executor.submit(_file_checksum, task))
+                    if len(pending) >= max_pending:
+                        results.append(pending.popleft().result())
+                results.extend(future.result() for future in pending)
+
+            if update_last_check and results:
+                _update_last_check(results)
+            for result in results:
+                yield result
+            if checkpoint:
+                _write_checkpoint(checkpoint, records_buckets[-1].record_id)
+    finally:
+        if executor is not None:
+            executor.shutdown()
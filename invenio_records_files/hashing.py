@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Computation of additional checksums while files are stored."""
+
+import hashlib
+import queue
+import threading
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
+
+
+def new_hash(algorithm):
+    """Create a message digest object.
+
+    Algorithms starting with ``xxh`` (e.g. ``xxh64`` or ``xxh3_128``) are
+    provided by the optional ``xxhash`` package, all others by
+    :mod:`hashlib`.
+
+    :param algorithm: Name of the algorithm.
+    :returns: The message digest object, or ``None`` if the algorithm is
+        provided by ``xxhash`` and the package is not installed.
+    :raises ValueError: If the algorithm is not supported.
+    """
+    if algorithm.startswith("xxh"):
+        if xxhash is None:
+            return None
+        try:
+            return getattr(xxhash, algorithm)()
+        except AttributeError:
+            raise ValueError("Unsupported hash type {0}".format(algorithm))
+    return hashlib.new(algorithm)
+
+
+class _HashingThread(threading.Thread):
+    """Thread feeding the chunks of a queue into a message digest."""
+
+    def __init__(self, algorithm, message_digest, maxsize=4):
+        """Initialize the thread."""
+        super(_HashingThread, self).__init__(name="hash-{0}".format(algorithm))
+        self.daemon = True
+        self.algorithm = algorithm
+        self.message_digest = message_digest
+        self.chunks = queue.Queue(maxsize=maxsize)
+
+    def run(self):
+        """Hash the chunks until ``None`` is received."""
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            self.message_digest.update(chunk)
+
+
+class MultiHashStream(object):
+    """Read-only stream computing several checksums of the data read from it.
+
+    Every chunk read through the stream is handed to one thread per
+    algorithm, so that the checksums are computed in the same read pass as
+    the one storing the file, and concurrently with it (:mod:`hashlib`
+    releases the GIL while hashing large chunks). Each thread buffers at most
+    a few chunks, which bounds the memory used.
+    """
+
+    def __init__(self, stream, algorithms):
+        """Wrap a stream.
+
+        :param stream: File-like stream.
+        :param algorithms: Names of the algorithms. Algorithms not available
+            (see :func:`new_hash`) are ignored.
+        """
+        self.stream = stream
+        self._threads = []
+        for algorithm in algorithms:
+            message_digest = new_hash(algorithm)
+            if message_digest is not None:
+                self._threads.append(_HashingThread(algorithm, message_digest))
+        for thread in self._threads:
+            thread.start()
+
+    def read(self, size=-1):
+        """Read data from the wrapped stream."""
+        chunk = self.stream.read(size)
+        if chunk:
+            self.update(chunk)
+        return chunk
+
+    def update(self, chunk):
+        """Hash a chunk of data which is not read from the wrapped stream."""
+        for thread in self._threads:
+            thread.chunks.put(chunk)
+
+    def close(self):
+        """Wait for the hashing threads to finish.
+
+        The wrapped stream is not closed.
+
+        :returns: Dictionary of checksums by algorithm, with the same format as
+            ``FileInstance.checksum`` (i.e. ``<algorithm>:<hex digest>``).
+        """
+        for thread in self._threads:
+            thread.chunks.put(None)
+        for thread in self._threads:
+            thread.join()
+        checksums = {
+            thread.algorithm: "{0}:{1}".format(
+                thread.algorithm, thread.message_digest.hexdigest()
+            )
+            for thread in self._threads
+        }
+        self._threads = []
+        return checksums
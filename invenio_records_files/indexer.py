@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Indexing of the files of the records.
+
+The ``_files`` key of the indexed documents is refreshed from the bucket of
+the records (so that it is complete even when the list of files is stored in
+the manifest, see
+:data:`invenio_records_files.config.RECORDS_FILES_MANIFEST_INLINE_LIMIT`).
+
+:func:`index_files` is a receiver of the ``before_record_index`` signal, which
+queries the files of every indexed record.
+:class:`FilesRecordIndexer` loads the records of a bulk indexing queue by
+chunks, with their files, so that indexing many records costs a few queries
+per chunk instead of a few queries per record.
+"""
+
+from itertools import islice
+
+from flask import current_app
+from invenio_indexer.api import RecordIndexer
+
+from .api import FilesMixin
+
+
+def dump_files(data, record):
+    """Set the files of a record in its indexed document.
+
+    :param data: The document to index.
+    :param record: The record being indexed.
+    """
+    if not isinstance(record, FilesMixin) or record.model is None:
+        return
+    files = record.files
+    if files is not None:
+        data["_files"] = files.dumps()
+
+
+def index_files(sender, json=None, record=None, **kwargs):
+    """Refresh the files of a record being indexed.
+
+    Receiver of the ``invenio_indexer.signals.before_record_index`` signal,
+    connected when
+    :data:`invenio_records_files.config.RECORDS_FILES_INDEX_FILES` is set.
+    It does not need to be connected when :class:`FilesRecordIndexer` is used.
+    """
+    dump_files(json, record)
+
+
+class FilesRecordIndexer(RecordIndexer):
+    """Record indexer loading the records and their files by chunks.
+
+    The messages of the bulk indexing queue are consumed by chunks. The
+    records of a chunk are fetched in one query and their buckets and files
+    in two more (see :meth:`invenio_records_files.api.FilesMixin.prefetch_files`),
+    before the documents are built.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the indexer.
+
+        :param chunk_size: Number of records loaded at once. (Default:
+            :data:`invenio_records_files.config.RECORDS_FILES_INDEXER_CHUNK_SIZE`)
+        """
+        self._chunk_size = kwargs.pop("chunk_size", None)
+        self._records = {}
+        super(FilesRecordIndexer, self).__init__(*args, **kwargs)
+
+    @property
+    def chunk_size(self):
+        """Get the number of records loaded at once."""
+        return (
+            self._chunk_size or current_app.config["RECORDS_FILES_INDEXER_CHUNK_SIZE"]
+        )
+
+    def _prefetch(self, messages):
+        """Load the records to index of a chunk of messages."""
+        ids = []
+        for message in messages:
+            payload = message.decode()
+            if payload.get("op") != "delete":
+                ids.append(payload["id"])
+        records = self.record_cls.get_records(ids) if ids else []
+        if issubclass(self.record_cls, FilesMixin):
+            self.record_cls.prefetch_files(records)
+        return {str(record.id): record for record in records}
+
+    def _actionsiter(self, message_iterator):
+        """Iterate bulk actions, loading the records by chunks."""
+        message_iterator = iter(message_iterator)
+        while True:
+            messages = list(islice(message_iterator, self.chunk_size))
+            if not messages:
+                return
+            self._records = self._prefetch(messages)
+            try:
+                for action in super(FilesRecordIndexer, self)._actionsiter(messages):
+                    yield action
+            finally:
+                self._records = {}
+
+    def _index_action(self, payload):
+        """Bulk index action, from the records loaded with the chunk."""
+        record = self._records.pop(payload["id"], None)
+        if record is None:
+            return super(FilesRecordIndexer, self)._index_action(payload)
+
+        index = self.record_to_index(record)
+        arguments = {}
+        body = self._prepare_record(record, index, arguments)
+        action = {
+            "_op_type": "index",
+            "_index": self._prepare_index(index),
+            "_id": str(record.id),
+            "_version": record.revision_id,
+            "_version_type": self._version_type,
+            "_source": body,
+        }
+        action.update(arguments)
+        return action
+
+    def _prepare_record(self, record, index, arguments=None, **kwargs):
+        """Prepare the record data for indexing, with its files."""
+        data = super(FilesRecordIndexer, self)._prepare_record(
+            record, index, arguments=arguments, **kwargs
+        )
+        dump_files(data, record)
+        return data
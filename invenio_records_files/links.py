@@ -9,9 +9,11 @@
 """Link for file bucket creation."""
 
 from flask import url_for
+from invenio_db import db
 from invenio_records_rest import current_records_rest
 
 from .api import Record
+from .models import RecordsBuckets
 
 
 def default_bucket_link_factory(pid):
@@ -41,3 +43,68 @@ def default_record_files_links_factory(pid, record=None, **kwargs):
         files=url_for(record_files_endpoint, pid_value=pid.pid_value, _external=True),
     )
     return links
+
+
+def default_bucket_link_batch_factory(pids):
+    """Factory for record bucket generation of many records at once.
+
+    All the buckets are resolved with a single query on
+    :class:`~invenio_records_files.models.RecordsBuckets`, which makes it
+    suitable for serializing a page of search results.
+
+    :param pids: List of Persistent Identifier instances.
+    :returns: List of bucket links (or ``None`` for records without bucket),
+        in the same order as ``pids``.
+    """
+    record_ids = [pid.get_assigned_object() if pid else None for pid in pids]
+    ids = [id_ for id_ in record_ids if id_]
+    buckets = {}
+    if ids:
+        buckets = dict(
+            db.session.query(RecordsBuckets.record_id, RecordsBuckets.bucket_id)
+            .filter(RecordsBuckets.record_id.in_(ids))
+            .all()
+        )
+    return [
+        (
+            url_for(
+                "invenio_files_rest.bucket_api",
+                bucket_id=buckets[record_id],
+                _external=True,
+            )
+            if record_id in buckets
+            else None
+        )
+        for record_id in record_ids
+    ]
+
+
+def default_record_files_links_batch_factory(pids, records=None, **kwargs):
+    """Factory for record files links generation of many records at once.
+
+    The endpoints are looked up once per persistent identifier type instead
+    of once per record.
+
+    :param pids: List of Persistent Identifier instances.
+    :returns: List of dictionaries containing the links of each record, in
+        the same order as ``pids``.
+    """
+    endpoints = {}
+    links = []
+    for pid in pids:
+        if pid.pid_type not in endpoints:
+            record_name = current_records_rest.default_endpoint_prefixes[pid.pid_type]
+            endpoints[pid.pid_type] = (
+                "invenio_records_rest.{0}_item".format(record_name),
+                "invenio_records_files.{0}_bucket_api".format(record_name),
+            )
+        record_endpoint, record_files_endpoint = endpoints[pid.pid_type]
+        links.append(
+            dict(
+                self=url_for(record_endpoint, pid_value=pid.pid_value, _external=True),
+                files=url_for(
+                    record_files_endpoint, pid_value=pid.pid_value, _external=True
+                ),
+            )
+        )
+    return links
@@ -10,6 +10,9 @@
 
 from __future__ import absolute_import
 
+import json
+import zlib
+
 from invenio_db import db
 from invenio_files_rest.models import Bucket
 from invenio_records.models import RecordMetadata
@@ -39,12 +42,42 @@ class RecordsBuckets(db.Model):
     )
     """Bucket related with the record."""
 
+    manifest = db.Column(db.LargeBinary, nullable=True)
+    """Compressed list of the files of the record, if stored out of line.
+
+    See :data:`invenio_records_files.config.RECORDS_FILES_MANIFEST_INLINE_LIMIT`.
+    """
+
     bucket = db.relationship(Bucket)
     """Relationship to the bucket."""
 
     record = db.relationship(RecordMetadata)
     """It is used by SQLAlchemy for optimistic concurrency control."""
 
+    @property
+    def files(self):
+        """Get the list of files from the manifest, if any.
+
+        The manifest is decompressed once, so the entries can be modified in
+        place like the ones of the ``_files`` key of the record.
+        """
+        if self.manifest is None:
+            return None
+        cached = getattr(self, "_files_cache", None)
+        if cached is None or cached[0] is not self.manifest:
+            files = json.loads(zlib.decompress(self.manifest).decode("utf-8"))
+            self._files_cache = cached = (self.manifest, files)
+        return cached[1]
+
+    @files.setter
+    def files(self, files):
+        """Store the list of files in the manifest."""
+        if files is None:
+            self.manifest = None
+        else:
+            self.manifest = zlib.compress(json.dumps(files).encode("utf-8"))
+            self._files_cache = (self.manifest, files)
+
     @classmethod
     def create(cls, record, bucket):
         """Create a new RecordsBuckets and adds it to the session.
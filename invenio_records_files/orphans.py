@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Garbage collection of the buckets of deleted records.
+
+A bucket is orphaned when it is not linked to any record and has been marked
+as deleted with its record (see :meth:`invenio_records_files.api.Record.delete`
+and :meth:`invenio_records_files.api.Record.delete_many`) or, optionally,
+when it is only linked to soft-deleted records. The buckets never linked to a
+record, or unlinked without being marked, may belong to other modules (e.g.
+standalone buckets of Invenio-Files-REST) and are only collected on request.
+The orphaned buckets are found with an anti-join on the indexed ``bucket_id``
+of :class:`~invenio_records_files.models.RecordsBuckets` and processed in
+chunks ordered by bucket id, each in its own transaction.
+
+The file instances used only by the orphaned buckets (e.g. not linked to
+another bucket by :meth:`invenio_records_files.api.Record.clone_files_from`)
+are the reclaimable ones.
+"""
+
+from datetime import datetime, timezone
+
+from flask import current_app
+from invenio_db import db
+from invenio_files_rest.models import (
+    Bucket,
+    BucketTag,
+    FileInstance,
+    MultipartObject,
+    ObjectVersion,
+    ObjectVersionTag,
+    Part,
+)
+from invenio_records.models import RecordMetadata
+from sqlalchemy import exists, or_, select
+from sqlalchemy.orm import aliased
+
+from .models import RecordsBuckets
+from .utils import Throttle
+
+
+def _orphans_query(
+    include_deleted_records=False, include_unlinked=False, older_than=None
+):
+    """Query the orphaned buckets, with the records they are linked to."""
+    link = aliased(RecordsBuckets)
+    live = exists().where(link.bucket_id == Bucket.id)
+    if include_deleted_records:
+        live = live.where(
+            RecordMetadata.id == link.record_id, RecordMetadata.json.isnot(None)
+        )
+    query = (
+        db.session.query(Bucket.id, RecordsBuckets.record_id)
+        .outerjoin(RecordsBuckets, RecordsBuckets.bucket_id == Bucket.id)
+        .filter(~live)
+    )
+    if not include_unlinked:
+        # Only the buckets known to have belonged to a record.
+        query = query.filter(
+            or_(Bucket.deleted.is_(True), RecordsBuckets.record_id.isnot(None))
+        )
+    if older_than is not None:
+        query = query.filter(
+            Bucket.updated < datetime.now(tz=timezone.utc) - older_than
+        )
+    return query
+
+
+def _chunk_files(bucket_ids):
+    """Get the reclaimable file instances of a chunk of buckets.
+
+    :returns: Dictionary of the lists of file instances by bucket id. A file
+        instance shared by several buckets of the chunk is listed once.
+    """
+    used = (
+        select(ObjectVersion.bucket_id, ObjectVersion.file_id)
+        .where(ObjectVersion.bucket_id.in_(bucket_ids))
+        .union(
+            select(MultipartObject.bucket_id, MultipartObject.file_id).where(
+                MultipartObject.bucket_id.in_(bucket_ids)
+            )
+        )
+        .subquery()
+    )
+    other_object = exists().where(
+        ObjectVersion.file_id == FileInstance.id,
+        ObjectVersion.bucket_id.notin_(bucket_ids),
+    )
+    other_multipart = exists().where(
+        MultipartObject.file_id == FileInstance.id,
+        MultipartObject.bucket_id.notin_(bucket_ids),
+    )
+    rows = (
+        db.session.query(used.c.bucket_id, FileInstance)
+        .join(FileInstance, FileInstance.id == used.c.file_id)
+        .filter(~other_object, ~other_multipart)
+        .order_by(used.c.bucket_id)
+    )
+    files = {bucket_id: [] for bucket_id in bucket_ids}
+    seen = set()
+    for bucket_id, fileinstance in rows:
+        if fileinstance.id not in seen:
+            seen.add(fileinstance.id)
+            files[bucket_id].append(fileinstance)
+    return files
+
+
+def _remove_buckets(bucket_ids, fileinstances):
+    """Remove buckets with their objects and reclaimable file instances.
+
+    The files are removed from the storage once the transaction is committed.
+    """
+    versions = select(ObjectVersion.version_id).where(
+        ObjectVersion.bucket_id.in_(bucket_ids)
+    )
+    uploads = select(MultipartObject.upload_id).where(
+        MultipartObject.bucket_id.in_(bucket_ids)
+    )
+    storages = [fileinstance.storage() for fileinstance in fileinstances]
+    with db.session.begin_nested():
+        for query in (
+            ObjectVersionTag.query.filter(ObjectVersionTag.version_id.in_(versions)),
+            Part.query.filter(Part.upload_id.in_(uploads)),
+            MultipartObject.query.filter(MultipartObject.bucket_id.in_(bucket_ids)),
+            ObjectVersion.query.filter(ObjectVersion.bucket_id.in_(bucket_ids)),
+            BucketTag.query.filter(BucketTag.bucket_id.in_(bucket_ids)),
+            RecordsBuckets.query.filter(RecordsBuckets.bucket_id.in_(bucket_ids)),
+            Bucket.query.filter(Bucket.id.in_(bucket_ids)),
+            FileInstance.query.filter(
+                FileInstance.id.in_([f.id for f in fileinstances])
+            ),
+        ):
+            query.delete(synchronize_session=False)
+    db.session.commit()
+
+    for storage in storages:
+        try:
+            storage.delete()
+        except Exception:
+            current_app.logger.warning(
+                "Failed to delete file {0}".format(storage.fileurl), exc_info=True
+            )
+
+
+def collect_orphaned_buckets(
+    chunk_size=1000,
+    action="report",
+    include_deleted_records=False,
+    include_unlinked=False,
+    older_than=None,
+    max_rate=None,
+):
+    """Find the orphaned buckets and optionally mark or remove them.
+
+    :param chunk_size: Number of buckets processed per transaction.
+    :param action: ``report`` only lists the buckets, ``mark`` marks them as
+        deleted (see :meth:`invenio_files_rest.models.Bucket.delete`) and
+        ``remove`` permanently removes them, with their objects and
+        reclaimable files.
+    :param include_deleted_records: Also collect the buckets only linked to
+        soft-deleted records.
+    :param include_unlinked: Also collect the buckets not linked to any
+        record and not marked as deleted, which may belong to other modules.
+    :param older_than: Only collect the buckets not updated for this
+        :class:`~datetime.timedelta`.
+    :param max_rate: Maximum number of buckets processed per second.
+    :returns: Iterator over the orphaned buckets, one dictionary per bucket
+        with the ``bucket_id``, the ``record_id`` it is linked to (if any), and
+        the number of reclaimable ``files`` with their ``size`` in bytes.
+    """
+    assert action in ("report", "mark", "remove")
+    throttle = Throttle(max_rate)
+    query = _orphans_query(include_deleted_records, include_unlinked, older_than)
+    after = None
+    while True:
+        chunk_query = query.order_by(Bucket.id)
+        if after is not None:
+            chunk_query = chunk_query.filter(Bucket.id > after)
+        rows = chunk_query.limit(chunk_size).all()
+        if not rows:
+            return
+        after = rows[-1][0]
+        buckets = {}
+        for bucket_id, record_id in rows:
+            buckets.setdefault(bucket_id, record_id)
+        bucket_ids = list(buckets)
+        throttle(len(bucket_ids))
+
+        files = _chunk_files(bucket_ids)
+        results = [
+            {
+                "bucket_id": bucket_id,
+                "record_id": record_id,
+                "files": len(files[bucket_id]),
+                "size": sum(f.size or 0 for f in files[bucket_id]),
+            }
+            for bucket_id, record_id in buckets.items()
+        ]
+        if action == "mark":
+            Bucket.query.filter(Bucket.id.in_(bucket_ids)).update(
+                {Bucket.deleted: True}, synchronize_session=False
+            )
+            db.session.commit()
+        elif action == "remove":
+            _remove_buckets(bucket_ids, [f for fs in files.values() for f in fs])
+        for result in results:
+            yield result
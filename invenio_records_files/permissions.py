@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Permission checks for record files."""
+
+import threading
+import time
+
+from flask import current_app, g
+from invenio_files_rest.views import ObjectResource
+
+
+class PermissionCache(object):
+    """Short-lived cache of granted permissions.
+
+    Only positive decisions are cached, keyed by ``(identity id, bucket id,
+    action, needs provided by the identity)``. The needs are part of the key
+    as identities may share an id (e.g. all the anonymous ones). A denied
+    permission is always checked again, so that the response (e.g. 401, 403
+    or 404) is built by the permission check itself.
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        """Initialize the cache.
+
+        :param ttl: Number of seconds a decision is kept.
+        :param maxsize: Maximum number of decisions kept.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Check if a permission has been granted recently."""
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is not None and expires > time.monotonic():
+                self.hits += 1
+                return True
+            self._entries.pop(key, None)
+            self.misses += 1
+            return False
+
+    def set(self, key):
+        """Remember that a permission has been granted."""
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) >= self.maxsize:
+                self._entries = {k: v for k, v in self._entries.items() if v > now}
+            while len(self._entries) >= self.maxsize:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = now + self.ttl
+
+    def invalidate(self, bucket_id):
+        """Forget all the decisions taken on a bucket."""
+        bucket_id = str(bucket_id)
+        with self._lock:
+            self._entries = {
+                k: v for k, v in self._entries.items() if k[1] != bucket_id
+            }
+
+    def clear(self):
+        """Forget all the decisions and reset the statistics."""
+        with self._lock:
+            self._entries = {}
+            self.hits = self.misses = 0
+
+    @property
+    def stats(self):
+        """Get the cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits) / total if total else 0.0,
+            "size": len(self._entries),
+        }
+
+
+def _permission_cache():
+    """Get the permission cache of the application, if enabled."""
+    ext = current_app.extensions.get("invenio-records-files")
+    return getattr(ext, "permission_cache", None)
+
+
+def invalidate_permission_cache(bucket_id):
+    """Forget the cached permissions of a bucket.
+
+    :param bucket_id: The bucket id.
+    """
+    cache = _permission_cache()
+    if cache is not None and bucket_id:
+        cache.invalidate(bucket_id)
+
+
+def check_object_permission(obj):
+    """Check the permission to read an object, aborting if not allowed.
+
+    Wraps :meth:`invenio_files_rest.views.ObjectResource.check_object_permission`
+    with the permission cache, when
+    :data:`invenio_records_files.config.RECORDS_FILES_PERMISSION_CACHE_TTL`
+    is set. The cache is bypassed, and emptied for the bucket, when the bucket
+    is locked or deleted.
+
+    :param obj: A :class:`~invenio_files_rest.models.ObjectVersion` instance.
+    """
+    cache = _permission_cache()
+    identity = g.get("identity")
+    if cache is None or identity is None:
+        return ObjectResource.check_object_permission(obj)
+
+    bucket = obj.bucket
+    if bucket.locked or bucket.deleted:
+        cache.invalidate(bucket.id)
+        return ObjectResource.check_object_permission(obj)
+
+    action = "object-read" if obj.is_head else "object-read-version"
+    key = (identity.id, str(bucket.id), action, frozenset(identity.provides))
+    if not cache.get(key):
+        ObjectResource.check_object_permission(obj)
+        cache.set(key)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Rebuild of the ``_files`` of all the records.
+
+The record ids are split in ranges, which are rebuilt in a pool of processes.
+Every worker loads the records of its range by batches, with their files
+(see :meth:`invenio_records_files.api.FilesMixin.prefetch_files`), rewrites
+their ``_files`` (and manifest) and commits once per batch.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from invenio_db import db
+
+from .api import Record
+from .models import RecordsBuckets
+from .utils import init_worker
+
+
+def _ranges(chunk_size):
+    """Split the ids of the records with a bucket in ranges.
+
+    :returns: Iterator over ``(after, last)`` pairs, the range being the ids
+        greater than ``after`` (if not ``None``) and up to ``last``.
+    """
+    after = None
+    while True:
+        query = db.session.query(RecordsBuckets.record_id).order_by(
+            RecordsBuckets.record_id
+        )
+        if after is not None:
+            query = query.filter(RecordsBuckets.record_id > after)
+        ids = [row[0] for row in query.limit(chunk_size)]
+        if not ids:
+            return
+        yield after, ids[-1]
+        after = ids[-1]
+
+
+def _rebuild_range(record_cls, after, last, batch_size):
+    """Rebuild the ``_files`` of the records of a range of ids.
+
+    :returns: The number of records rebuilt.
+    """
+    query = db.session.query(RecordsBuckets.record_id).filter(
+        RecordsBuckets.record_id <= last
+    )
+    if after is not None:
+        query = query.filter(RecordsBuckets.record_id > after)
+    ids = sorted(row[0] for row in query)
+
+    rebuilt = 0
+    for start in range(0, len(ids), batch_size):
+        records = record_cls.get_records(ids[start : start + batch_size])
+        record_cls.prefetch_files(records)
+        for record in records:
+            files = record.files
+            if files is None:
+                continue
+            files._write(files.dumps())
+            record.commit()
+            rebuilt += 1
+        db.session.commit()
+    return rebuilt
+
+
+def rebuild_files(chunk_size=1000, batch_size=100, workers=None, record_cls=Record):
+    """Rebuild the ``_files`` of all the records from their buckets.
+
+    :param chunk_size: Number of records per range handed to a worker.
+    :param batch_size: Number of records loaded and committed at once.
+    :param workers: Number of worker processes. ``0`` rebuilds the records in
+        the current process. (Default: number of CPUs)
+    :param record_cls: Record class of the records.
+    :returns: Iterator over the number of records rebuilt per range, in the
+        order of the ranges.
+    """
+    if workers == 0:
+        for after, last in _ranges(chunk_size):
+            yield _rebuild_range(record_cls, after, last, batch_size)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_worker,
+        initargs=(current_app._get_current_object(),),
+    )
+    pending = deque()
+    try:
+        for after, last in _ranges(chunk_size):
+            pending.append(
+                executor.submit(_rebuild_range, record_cls, after, last, batch_size)
+            )
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # The ranges not started yet are not rebuilt, e.g. when the iterator
+        # is closed early.
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Reconciliation of the ``_files`` of the records with their buckets.
+
+The ``_files`` key of a record is a copy of the head objects of its bucket,
+which drifts when the objects are changed without going through
+:class:`invenio_records_files.api.FilesIterator` (e.g. through the
+Invenio-Files-REST endpoints). The reconciliation walks all the records with
+a bucket, in chunks ordered by record id. For every chunk, the head objects of
+the buckets and the metadata of the records are fetched in one query each, and
+the files of each record are compared as sets of ``(key, version id,
+checksum, size)`` entries.
+"""
+
+from invenio_db import db
+from invenio_files_rest.models import FileInstance, ObjectVersion
+from invenio_records.models import RecordMetadata
+
+from .api import Record
+from .utils import Throttle, iter_records_buckets
+
+
+def _entry(data):
+    """Get the comparable entry of a file of ``_files``."""
+    return (
+        data.get("key"),
+        data.get("version_id"),
+        data.get("checksum"),
+        data.get("size"),
+    )
+
+
+def _chunk_heads(records_buckets):
+    """Get the entries of the head objects of a chunk of records buckets."""
+    heads = {rb.bucket_id: {} for rb in records_buckets}
+    rows = (
+        db.session.query(
+            ObjectVersion.bucket_id,
+            ObjectVersion.key,
+            ObjectVersion.version_id,
+            FileInstance.checksum,
+            FileInstance.size,
+        )
+        .join(FileInstance, FileInstance.id == ObjectVersion.file_id)
+        .filter(
+            ObjectVersion.bucket_id.in_(list(heads)),
+            ObjectVersion.is_head.is_(True),
+        )
+    )
+    for bucket_id, key, version_id, checksum, size in rows:
+        heads[bucket_id][key] = (key, str(version_id), checksum, size)
+    return heads
+
+
+def _chunk_files(records_buckets):
+    """Get the entries of the ``_files`` of a chunk of records.
+
+    The files of a record are taken from the manifest of its bucket, if any.
+    Deleted records are left out.
+    """
+    rows = db.session.query(RecordMetadata.id, RecordMetadata.json).filter(
+        RecordMetadata.id.in_([rb.record_id for rb in records_buckets])
+    )
+    metadata = {record_id: json for record_id, json in rows if json is not None}
+    files = {}
+    for rb in records_buckets:
+        if rb.record_id not in metadata:
+            continue
+        entries = rb.files
+        if entries is None:
+            entries = metadata[rb.record_id].get("_files") or []
+        files[rb.record_id] = {f.get("key"): _entry(f) for f in entries}
+    return files
+
+
+def _compare(files, heads):
+    """Compare the files of a record with the head objects of its bucket."""
+    changed = [key for key in set(files) & set(heads) if files[key] != heads[key]]
+    return {
+        "missing": sorted(set(heads) - set(files)),
+        "extra": sorted(set(files) - set(heads)),
+        "changed": sorted(changed),
+    }
+
+
+def reconcile_files(
+    chunk_size=1000, repair=False, max_rate=None, after=None, record_cls=Record
+):
+    """Find the records whose ``_files`` do not match their bucket.
+
+    :param chunk_size: Number of records fetched per query.
+    :param repair: Rewrite the ``_files`` of the mismatched records from their
+        bucket. The changes are committed after every chunk.
+    :param max_rate: Maximum number of records checked per second.
+    :param after: Only check the records with an id greater than this one,
+        e.g. to resume an interrupted reconciliation.
+    :param record_cls: Record class used to repair the records.
+    :returns: Iterator over the mismatches, one dictionary per record with the
+        ``record_id``, the keys ``missing`` from ``_files``, the ``extra``
+        keys of ``_files``, the keys whose file ``changed``, and whether the
+        record has been ``repaired``.
+    """
+    throttle = Throttle(max_rate)
+    for records_buckets in iter_records_buckets(chunk_size, after=after):
+        throttle(len(records_buckets))
+        heads = _chunk_heads(records_buckets)
+        files = _chunk_files(records_buckets)
+
+        mismatches = []
+        for rb in records_buckets:
+            if rb.record_id not in files:
+                continue
+            result = _compare(files[rb.record_id], heads[rb.bucket_id])
+            if result["missing"] or result["extra"] or result["changed"]:
+                result.update(record_id=rb.record_id, repaired=False)
+                mismatches.append(result)
+
+        if repair and mismatches:
+            records = record_cls.prefetch_files(
+                record_cls.get_records([result["record_id"] for result in mismatches])
+            )
+            for record in records:
+                files = record.files
+                files._write(files.dumps())
+                record.commit()
+            db.session.commit()
+            for result in mismatches:
+                result["repaired"] = True
+
+        for result in mismatches:
+            yield result
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Coalesced reindexing of the records whose files changed.
+
+The records whose files change (see
+:data:`invenio_records_files.signals.record_files_changed`) are collected in
+the session, and handed to the :class:`ReindexQueue` of the application when
+the transaction is committed. The queue waits until the files of a record
+have not changed for a while before reindexing it, so that a burst of changes
+on a record (e.g. thousands of uploads) produces a single reindex.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from invenio_db import db
+
+_PENDING_REINDEX = "invenio_records_files_pending_reindex"
+"""Key of the session info holding the ids of the records to reindex."""
+
+
+def bulk_index(record_ids):
+    """Send records to the bulk indexing queue of Invenio-Indexer."""
+    from invenio_indexer.api import RecordIndexer
+
+    RecordIndexer().bulk_index(record_ids)
+
+
+class ReindexQueue(object):
+    """Coalescing queue of records to reindex.
+
+    A record is reindexed once no change has been added for it during
+    ``delay`` seconds, or at the latest ``max_delay`` seconds after its first
+    change. The due records are indexed in batches by a worker thread,
+    started with the first record added.
+    """
+
+    def __init__(
+        self, app, index_records=None, delay=5.0, max_delay=60.0, batch_size=500
+    ):
+        """Initialize the queue.
+
+        :param app: The Flask application, in which the records are indexed.
+        :param index_records: Function called with a list of record ids to
+            index. (Default: :func:`bulk_index`)
+        :param delay: Number of seconds without change before a record is
+            reindexed.
+        :param max_delay: Maximum number of seconds a record waits.
+        :param batch_size: Maximum number of records indexed at once.
+        """
+        self.app = app
+        self.index_records = index_records or bulk_index
+        self.delay = delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        # Deadlines of the records, by id, with their first change time.
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self):
+        """Get the number of records waiting to be reindexed."""
+        return len(self._pending)
+
+    def add(self, *record_ids):
+        """Add records to reindex, postponing the ones already queued."""
+        now = time.monotonic()
+        with self._condition:
+            for record_id in record_ids:
+                first = self._pending.pop(record_id, (None, now))[1]
+                deadline = min(now + self.delay, first + self.max_delay)
+                self._pending[record_id] = (deadline, first)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(
+                    target=self._run, name="records-files-reindex"
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def _pop(self, force=False):
+        """Remove a batch of due records from the queue.
+
+        :returns: A tuple with the list of record ids and the number of
+            seconds until the next deadline (``None`` if the queue is empty).
+        """
+        now = time.monotonic()
+        batch = []
+        for record_id, (deadline, _) in self._pending.items():
+            if len(batch) >= self.batch_size:
+                break
+            if force or deadline <= now:
+                batch.append(record_id)
+        for record_id in batch:
+            del self._pending[record_id]
+        if not self._pending:
+            return batch, None
+        return batch, max(min(d for d, _ in self._pending.values()) - now, 0)
+
+    def _index(self, batch):
+        """Index a batch of records, logging the errors."""
+        with self.app.app_context():
+            try:
+                self.index_records(batch)
+            except Exception:
+                self.app.logger.exception(
+                    "Failed to reindex {0} records.".format(len(batch))
+                )
+
+    def _run(self):
+        """Index the due records until the queue is stopped."""
+        while True:
+            with self._condition:
+                batch, timeout = self._pop()
+                while not batch and not self._stopped:
+                    self._condition.wait(timeout)
+                    batch, timeout = self._pop()
+                if not batch:
+                    return
+            self._index(batch)
+
+    def flush(self):
+        """Index all the queued records now, in the calling thread."""
+        while True:
+            with self._condition:
+                batch, _ = self._pop(force=True)
+            if not batch:
+                return
+            self._index(batch)
+
+    def stop(self, flush=True):
+        """Stop the worker thread.
+
+        :param flush: Index the queued records before returning.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
+
+
+def queue_reindex(sender, record=None, **kwargs):
+    """Mark a record whose files changed to be reindexed.
+
+    Receiver of the
+    :data:`invenio_records_files.signals.record_files_changed` signal.
+    """
+    if record is not None and record.id is not None:
+        db.session.info.setdefault(_PENDING_REINDEX, set()).add(record.id)
+
+
+def enqueue_reindex(session):
+    """Queue the records marked in a committed transaction.
+
+    Listener of the ``after_commit`` session event.
+    """
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(_PENDING_REINDEX, None)
+    if pending:
+        ext = current_app.extensions.get("invenio-records-files")
+        queue = getattr(ext, "reindex_queue", None)
+        if queue is not None:
+            queue.add(*sorted(pending, key=str))
+
+
+def discard_reindex(session, transaction):
+    """Forget the marked records when a transaction ends without commit."""
+    if transaction.parent is None:
+        session.info.pop(_PENDING_REINDEX, None)
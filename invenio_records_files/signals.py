@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Signals for Invenio-Records-Files."""
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+record_files_changed = _signals.signal("record-files-changed")
+"""Record files changed signal.
+
+Sent when files of a record are added, replaced, deleted or renamed through
+:class:`invenio_records_files.api.FilesIterator`, once per operation. The
+sender is the current Flask application, and two keyword arguments are
+provided:
+
+- ``record``: The record whose files changed.
+- ``keys``: The list of the changed keys (for a rename, the old and new keys).
+
+The signal is sent before the transaction is committed.
+"""
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Short-lived signed download URLs for record files.
+
+A signed URL grants access to a single object version until it expires. The
+signature is an HMAC of the bucket id, key, version id and expiration time
+keyed with a key derived from the application ``SECRET_KEY`` for this purpose
+only, so the URLs can be verified in-process without resolving the record or
+running the permission factory.
+"""
+
+import hashlib
+import hmac
+import time
+
+from flask import abort, current_app, request, url_for
+from invenio_files_rest.models import ObjectVersion
+from invenio_files_rest.signals import file_downloaded
+
+_SALT = b"invenio-records-files-signed-url"
+"""Salt of the key of the signatures, derived from the ``SECRET_KEY``."""
+
+
+def _signing_key():
+    """Get the key of the signatures of the download URLs."""
+    return hmac.new(
+        current_app.config["SECRET_KEY"].encode("utf-8"), _SALT, hashlib.sha256
+    ).digest()
+
+
+def _signature(bucket_id, key, version_id, expires):
+    """Compute the signature of a download URL."""
+    message = "\n".join([str(bucket_id), key, str(version_id or ""), str(expires)])
+    return hmac.new(_signing_key(), message.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def sign_object_url(bucket_id, key, version_id=None, expires_in=None, **kwargs):
+    """Build a signed download URL for an object.
+
+    :param bucket_id: The bucket id.
+    :param key: The file key.
+    :param version_id: The version ID. If not given, the URL serves the latest
+        version of the object at the time of download.
+    :param expires_in: Validity of the URL in seconds. (Default:
+        :data:`invenio_records_files.config.RECORDS_FILES_SIGNED_URL_EXPIRES`)
+    :param kwargs: Keyword arguments passed to ``url_for()``.
+    :returns: The signed URL.
+    """
+    if expires_in is None:
+        expires_in = current_app.config["RECORDS_FILES_SIGNED_URL_EXPIRES"]
+    expires = int(time.time()) + expires_in
+    params = {"expires": expires}
+    if version_id:
+        params["versionId"] = str(version_id)
+    kwargs.setdefault("_external", True)
+    return url_for(
+        "invenio_records_files.signed_object_api",
+        bucket_id=str(bucket_id),
+        key=key,
+        signature=_signature(bucket_id, key, version_id, expires),
+        **dict(params, **kwargs),
+    )
+
+
+def verify_signature(bucket_id, key, version_id, expires, signature):
+    """Check the signature and expiration of a download URL.
+
+    :returns: ``True`` if the URL is valid and has not expired.
+    """
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(
+        _signature(bucket_id, key, version_id, expires), signature or ""
+    )
+
+
+def signed_object_download(bucket_id, key):
+    """Send an object of a signed download URL.
+
+    The record is not loaded and no permission is checked: holding a valid
+    signature is the authorization.
+
+    :param bucket_id: The bucket id.
+    :param key: The file key.
+    :returns: A Flask response.
+    """
+    version_id = request.args.get("versionId")
+    if not verify_signature(
+        bucket_id,
+        key,
+        version_id,
+        request.args.get("expires"),
+        request.args.get("signature"),
+    ):
+        abort(403)
+
+    obj = ObjectVersion.get(bucket_id, key, version_id=version_id)
+    if not obj or obj.deleted:
+        abort(404)
+
+    file_downloaded.send(current_app._get_current_object(), obj=obj)
+    return obj.send_file(as_attachment="download" in request.args)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Zero-copy ingestion of local files into local file storages."""
+
+import errno
+import io
+import mmap
+import os
+import stat
+
+from invenio_files_rest.helpers import chunk_size_or_default
+from invenio_files_rest.storage import PyFSFileStorage
+from invenio_files_rest.storage.base import check_sizelimit
+from six.moves.urllib.parse import urlsplit
+
+from .hashing import MultiHashStream
+
+
+def is_local_storage(storage):
+    """Check if a file storage writes to the local file system."""
+    return isinstance(storage, PyFSFileStorage) and urlsplit(
+        storage.fileurl
+    ).scheme in ("", "file")
+
+
+def _copy_fd(src, dst, offset, size):
+    """Copy a range of a file into another one, within the kernel.
+
+    ``copy_file_range()`` is used when available (it can even share the
+    blocks on some file systems), ``sendfile()`` otherwise.
+    """
+    copied = 0
+    use_copy_file_range = hasattr(os, "copy_file_range")
+    while copied < size:
+        if use_copy_file_range:
+            try:
+                count = os.copy_file_range(src, dst, size - copied, offset + copied)
+            except OSError as exc:
+                if copied or exc.errno not in (
+                    errno.EXDEV,
+                    errno.ENOSYS,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                ):
+                    raise
+                use_copy_file_range = False
+                continue
+        else:
+            count = os.sendfile(dst, src, offset + copied, size - copied)
+        if not count:
+            raise IOError("File is smaller than expected.")
+        copied += count
+
+
+def compute_checksums(storage, fd, offset, size, algorithms=None):
+    """Compute the checksums of a range of a file from a memory map.
+
+    :param storage: The file storage whose checksum algorithm is used.
+    :param fd: File descriptor of the local file.
+    :param offset: Position of the range.
+    :param size: Size of the range.
+    :param algorithms: Names of the algorithms of the extra checksums.
+    :returns: A tuple with the checksum computed with the algorithm of the
+        storage backend and the dictionary of extra checksums.
+    """
+    algo, message_digest = storage._init_hash()
+    hashers = MultiHashStream(None, algorithms or [])
+    if not size:
+        return "{0}:{1}".format(algo, message_digest.hexdigest()), hashers.close()
+
+    chunk_size = chunk_size_or_default(None)
+    # Maps must start at a multiple of the allocation granularity.
+    start = offset % mmap.ALLOCATIONGRANULARITY
+    with mmap.mmap(
+        fd, start + size, access=mmap.ACCESS_READ, offset=offset - start
+    ) as data:
+        view = memoryview(data)
+        chunk = None
+        try:
+            for pos in range(start, start + size, chunk_size):
+                chunk = view[pos : min(pos + chunk_size, start + size)]
+                hashers.update(chunk)
+                message_digest.update(chunk)
+        finally:
+            # All the views must be released before the map is closed.
+            checksums = hashers.close()
+            chunk = None
+            view.release()
+    return "{0}:{1}".format(algo, message_digest.hexdigest()), checksums
+
+
+def local_source(stream):
+    """Get the file descriptor of a local regular file.
+
+    Only paths and binary files opened with :func:`open` qualify: other file
+    objects may have a descriptor whose content is not the one they read (e.g.
+    :class:`gzip.GzipFile` reads the compressed file underneath).
+
+    :param stream: Path of a file or file object.
+    :returns: A tuple with the file descriptor, the offset to read from and
+        whether the descriptor has been opened by this function (and must be
+        closed by the caller), or ``None`` if the stream is not backed by a
+        local regular file.
+    """
+    if isinstance(stream, (str, os.PathLike)):
+        fd, offset, opened = os.open(stream, os.O_RDONLY), 0, True
+    else:
+        raw = stream
+        if isinstance(stream, (io.BufferedReader, io.BufferedRandom)):
+            raw = stream.raw
+        if not isinstance(raw, io.FileIO):
+            return None
+        try:
+            fd, offset, opened = stream.fileno(), stream.tell(), False
+        except (AttributeError, OSError, ValueError):
+            return None
+    if not stat.S_ISREG(os.fstat(fd).st_mode):
+        if opened:
+            os.close(fd)
+        return None
+    return fd, offset, opened
+
+
+def save_local_file(storage, fd, offset=0, size_limit=None, algorithms=None):
+    """Save a local file into a local file storage.
+
+    The data is copied by the kernel (see ``copy_file_range()`` and
+    ``sendfile()``) and the checksums are computed over a memory map of the
+    source, so the content never goes through Python read buffers.
+
+    :param storage: A local file storage (see :func:`is_local_storage`).
+    :param fd: File descriptor of the local file.
+    :param offset: Position from where the file is copied.
+    :param size_limit: ``FileSizeLimit`` instance to limit the file size.
+    :param algorithms: Names of the algorithms of the extra checksums.
+    :returns: A tuple with the ``(uri, size, checksum)`` of the stored file and
+        the dictionary of extra checksums.
+    """
+    size = os.fstat(fd).st_size - offset
+    check_sizelimit(size_limit, size, None)
+
+    fp = storage.open(mode="wb")
+    try:
+        _copy_fd(fd, fp.fileno(), offset, size)
+        checksum, checksums = compute_checksums(storage, fd, offset, size, algorithms)
+    except Exception:
+        fp.close()
+        storage.delete()
+        raise
+    fp.close()
+    storage._size = size
+    return (storage.fileurl, size, checksum), checksums
+
+
+def update_local_file(storage, fd, offset, size):
+    """Copy a range of a local file at the same position of a local storage.
+
+    This is the equivalent of ``storage.update()`` for a part of a multipart
+    upload, see :func:`save_local_file`.
+
+    :param storage: A local file storage (see :func:`is_local_storage`).
+    :param fd: File descriptor of the local file.
+    :param offset: Position of the range in both files.
+    :param size: Size of the range.
+    :returns: A tuple with the number of bytes written and their checksum.
+    """
+    fp = storage.open(mode="r+b")
+    try:
+        fp.seek(offset)
+        _copy_fd(fd, fp.fileno(), offset, size)
+    finally:
+        fp.close()
+    checksum, _ = compute_checksums(storage, fd, offset, size)
+    return size, checksum
@@ -10,25 +10,98 @@
 
 from __future__ import absolute_import, print_function
 
+import time
+
 from flask import abort, request
+from invenio_db import db
 from invenio_files_rest.models import ObjectVersion
 from invenio_files_rest.views import ObjectResource
 from invenio_records.errors import MissingModelError
+from sqlalchemy.orm import joinedload
+
+from .models import RecordsBuckets
+from .permissions import check_object_permission
 
 
-def sorted_files_from_bucket(bucket, keys=None):
+def sorted_files_from_bucket(bucket, keys=None, objects=None):
     """Return files from bucket sorted by given keys.
 
     :param bucket: :class:`~invenio_files_rest.models.Bucket` containing the
         files.
     :param keys: Keys order to be used.
+    :param objects: Head objects of the bucket, if already fetched.
     :returns: Sorted list of bucket items.
     """
     keys = keys or []
     total = len(keys)
     sortby = dict(zip(keys, range(total)))
-    values = ObjectVersion.get_by_bucket(bucket).all()
-    return sorted(values, key=lambda x: sortby.get(x.key, total))
+    if objects is None:
+        # The file instances are needed to dump the files.
+        objects = (
+            ObjectVersion.get_by_bucket(bucket)
+            .options(joinedload(ObjectVersion.file))
+            .all()
+        )
+    return sorted(objects, key=lambda x: sortby.get(x.key, total))
+
+
+def iter_records_buckets(chunk_size=1000, after=None):
+    """Iterate over all the records buckets in chunks.
+
+    The rows are ordered by record id and fetched with keyset pagination, so
+    each chunk costs one indexed query however far the iteration is.
+
+    :param chunk_size: Number of rows per chunk.
+    :param after: Only return rows with a record id greater than this one, e.g.
+        to resume an interrupted iteration.
+    :returns: Iterator over lists of
+        :class:`~invenio_records_files.models.RecordsBuckets`.
+    """
+    while True:
+        query = RecordsBuckets.query.order_by(RecordsBuckets.record_id)
+        if after is not None:
+            query = query.filter(RecordsBuckets.record_id > after)
+        chunk = query.limit(chunk_size).all()
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1].record_id
+
+
+class Throttle(object):
+    """Limit the amount of work (e.g. bytes read or records checked) per second.
+
+    :param rate: Maximum amount per second, or ``None`` for no limit.
+    """
+
+    def __init__(self, rate):
+        """Initialize the throttle."""
+        self.rate = rate
+        self.start = time.monotonic()
+        self.amount = 0
+
+    def __call__(self, amount):
+        """Account for an amount of work about to be done, sleeping if needed."""
+        if not self.rate:
+            return
+        delay = self.start + float(self.amount) / self.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.amount += amount
+
+
+def init_worker(app):
+    """Push an application context in a worker process.
+
+    Initializer of the forked worker processes: the application is inherited
+    from the parent process instead of being pickled, and the database
+    connections inherited with it are left to the parent, each worker opening
+    its own.
+
+    :param app: The Flask application.
+    """
+    app.app_context().push()
+    db.engine.dispose(close=False)
 
 
 def record_file_factory(pid, record, filename):
@@ -84,7 +157,7 @@ def file_download_ui(pid, record, _record_file_factory=None, **kwargs):
     obj = fileobj.obj
 
     # Check permissions
-    ObjectResource.check_object_permission(obj)
+    check_object_permission(obj)
 
     # Send file.
     return ObjectResource.send_object(
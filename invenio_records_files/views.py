@@ -10,16 +10,32 @@
 
 from __future__ import absolute_import, print_function
 
+from calendar import timegm
 from functools import partial, wraps
 
-from flask import Blueprint
+from flask import Blueprint, abort, current_app, request, stream_with_context
+from flask.views import MethodView
+from invenio_db import db
+from invenio_files_rest.errors import FileSizeError
+from invenio_files_rest.helpers import send_stream
+from invenio_files_rest.models import FileInstance, ObjectVersion, ObjectVersionTag
+from invenio_files_rest.proxies import current_files_rest, current_permission_factory
 from invenio_files_rest.serializer import json_serializer
-from invenio_files_rest.views import BucketResource, ObjectResource
+from invenio_files_rest.signals import file_uploaded
+from invenio_files_rest.views import (
+    BucketResource,
+    ObjectResource,
+    check_permission,
+    pass_bucket,
+    use_kwargs_from_query,
+)
 from invenio_records_rest.views import pass_record
 from six import iteritems
 from six.moves.urllib.parse import urljoin
 
+from .archive import ARCHIVE_MIMETYPES, archive_factories
 from .serializer import serializer_mapping
+from .signing import signed_object_download
 
 
 def create_blueprint_from_app(app):
@@ -68,15 +84,32 @@ def create_blueprint_from_app(app):
                     )
                 },
             )
+            archive_view = RecordBucketArchiveResource.as_view(
+                endpoint_prefix + "_bucket_archive_api"
+            )
             records_files_blueprint.add_url_rule(
                 "{rec_item_route}{files_path_name}".format(**locals()),
                 view_func=bucket_view,
             )
+            records_files_blueprint.add_url_rule(
+                "{rec_item_route}{files_path_name}.<any(zip, tar):archive_format>".format(
+                    **locals()
+                ),
+                view_func=archive_view,
+            )
             records_files_blueprint.add_url_rule(
                 "{rec_item_route}{files_path_name}/<path:key>".format(**locals()),
                 view_func=object_view,
             )
 
+    signed_url_route = app.config.get("RECORDS_FILES_SIGNED_URL_ROUTE")
+    if signed_url_route:
+        records_files_blueprint.add_url_rule(
+            signed_url_route,
+            "signed_object_api",
+            view_func=signed_object_download,
+        )
+
     return records_files_blueprint
 
 
@@ -119,6 +152,44 @@ class RecordBucketResource(BucketResource):
         return super(RecordBucketResource, self).head(**kwargs)
 
 
+class RecordBucketArchiveResource(MethodView):
+    """RecordBucket archive resource."""
+
+    @pass_record
+    def get(self, pid, record, archive_format=None, **kwargs):
+        """Stream the files of the record as a single archive.
+
+        Only the objects whose key starts with the ``prefix`` query argument
+        are included, if given. Permissions are checked for every object
+        before the first byte is sent.
+
+        :param pid: The pid value of the record to get the bucket from.
+        :param archive_format: Format of the archive (``zip`` or ``tar``).
+        :returns: A streamed Flask response.
+        """
+        files = getattr(record, "files", None)
+        if files is None:
+            abort(404)
+        check_permission(current_permission_factory(files.bucket, "bucket-read"))
+
+        prefix = request.args.get("prefix", "")
+        objects = [f.obj for f in files if f.key.startswith(prefix)]
+        for obj in objects:
+            ObjectResource.check_object_permission(obj)
+
+        response = current_app.response_class(
+            stream_with_context(archive_factories[archive_format](objects)),
+            mimetype=ARCHIVE_MIMETYPES[archive_format],
+            direct_passthrough=True,
+        )
+        response.headers.add(
+            "Content-Disposition",
+            "attachment",
+            filename="{0}.{1}".format(pid.pid_value, archive_format),
+        )
+        return response
+
+
 class RecordObjectResource(ObjectResource):
     """RecordObject item resource."""
 
@@ -134,6 +205,53 @@ class RecordObjectResource(ObjectResource):
         """
         return super(RecordObjectResource, self).get(**kwargs)
 
+    @pass_record
+    @pass_bucket_id
+    def head(self, pid, record, **kwargs):
+        """Get the metadata of an object without sending its content.
+
+        :param pid: The pid value of the record to get the bucket from.
+        :kwargs: contains all the parameters used by the ObjectResource view in
+            Invenio-Files-Rest
+        :returns: A Flask response.
+        """
+        return self.head_object(**kwargs)
+
+    @use_kwargs_from_query(ObjectResource.get_args)
+    @pass_bucket
+    def head_object(
+        self, bucket=None, key=None, version_id=None, download=None, **kwargs
+    ):
+        """Answer a HEAD request from the object and file instance rows.
+
+        The headers are built by ``send_stream``, like the ones of a GET
+        request, but from the database only, so the storage backend is never
+        opened.
+
+        :param bucket: The bucket (instance or id) to get the object from.
+        :param key: The file key.
+        :param version_id: The version ID.
+        :param download: The download flag.
+        :returns: A Flask response without body.
+        """
+        obj = self.get_object(bucket, key, version_id)
+        fileinstance = obj.file
+        content_md5 = None
+        if fileinstance.checksum:
+            algo, value = fileinstance.checksum.split(":", 1)
+            if algo == "md5":
+                content_md5 = value
+        return send_stream(
+            iter(()),
+            obj.basename,
+            fileinstance.size,
+            timegm(fileinstance.updated.timetuple()) if fileinstance.updated else None,
+            mimetype=obj.mimetype,
+            etag=fileinstance.checksum,
+            content_md5=content_md5,
+            as_attachment=download is not None,
+        )
+
     @pass_record
     @pass_bucket_id
     def put(self, pid, record, **kwargs):
@@ -146,6 +264,81 @@ class RecordObjectResource(ObjectResource):
         """
         return super(RecordObjectResource, self).put(**kwargs)
 
+    def create_object(self, bucket, key):
+        """Create a new object, without reading the body if it is known.
+
+        Clients can declare the content they are about to send with the
+        ``X-Checksum`` header (in the ``<algorithm>:<hex digest>`` format of
+        ``FileInstance.checksum``) and the ``Content-Length`` header. If the
+        head object of the key already has this content, nothing is changed.
+        If another object of the bucket has it, the new object is linked to
+        its file instance. In both cases the body is not read, so a client
+        sending ``Expect: 100-continue`` does not upload it at all.
+
+        :param bucket: The bucket (instance or id) to get the object from.
+        :param key: The file key.
+        :returns: A Flask response.
+        """
+        checksum = request.headers.get("X-Checksum")
+        size = request.content_length
+        if not checksum or size is None:
+            return super(RecordObjectResource, self).create_object(bucket, key)
+
+        _, _, _, tags = current_files_rest.upload_factory()
+        head = ObjectVersion.get(bucket, key)
+        if (
+            not tags
+            and head is not None
+            and head.file is not None
+            and head.file.checksum == checksum
+            and head.file.size == size
+        ):
+            obj = head
+        else:
+            # Only files of the same bucket are linked: knowing the checksum of
+            # a file must not grant access to it.
+            fileinstance = (
+                FileInstance.query.join(
+                    ObjectVersion, ObjectVersion.file_id == FileInstance.id
+                )
+                .filter(
+                    ObjectVersion.bucket_id == bucket.id,
+                    FileInstance.checksum == checksum,
+                    FileInstance.size == size,
+                    FileInstance.readable.is_(True),
+                )
+                .first()
+            )
+            if fileinstance is None:
+                return super(RecordObjectResource, self).create_object(bucket, key)
+
+            # The linked file counts towards the quota like an uploaded one.
+            size_limit = bucket.size_limit
+            if size_limit and size > size_limit:
+                raise FileSizeError(
+                    description=(
+                        "File size limit exceeded."
+                        if isinstance(size_limit, int)
+                        else size_limit.reason
+                    )
+                )
+
+            with db.session.begin_nested():
+                obj = ObjectVersion.create(bucket, key, _file_id=fileinstance)
+                for tag_key, value in (tags or {}).items():
+                    ObjectVersionTag.create(obj, tag_key, value)
+            db.session.commit()
+            file_uploaded.send(current_app._get_current_object(), obj=obj)
+
+        return self.make_response(
+            data=obj,
+            context={
+                "class": ObjectVersion,
+                "bucket": bucket,
+            },
+            etag=obj.file.checksum,
+        )
+
     @pass_record
     @pass_bucket_id
     def delete(self, pid, record, **kwargs):
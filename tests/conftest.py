@@ -102,6 +102,7 @@ def app(request, docid_record_type_endpoint):
             "Allow", (object,), {"can": lambda self: True}
         )(),
         SECRET_KEY="CHANGE_ME",
+        RECORDS_FILES_SIGNED_URL_ROUTE="/signed-files/<bucket_id>/<path:key>",
         SQLALCHEMY_DATABASE_URI=os.environ.get("SQLALCHEMY_DATABASE_URI", "sqlite://"),
         SQLALCHEMY_TRACK_MODIFICATIONS=True,
         TESTING=True,
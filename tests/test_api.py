@@ -10,13 +10,29 @@
 
 from __future__ import absolute_import, print_function
 
+import gzip
+import hashlib
+import os
+
+import mock
 import pytest
-from invenio_files_rest.errors import InvalidOperationError
-from invenio_files_rest.models import Bucket, ObjectVersion
+from invenio_files_rest.errors import FileSizeError, InvalidOperationError
+from invenio_files_rest.models import (
+    Bucket,
+    FileInstance,
+    MultipartObject,
+    ObjectVersion,
+    ObjectVersionTag,
+    Part,
+)
 from invenio_records.errors import MissingModelError
 from six import BytesIO
+from sqlalchemy import event
 
 from invenio_records_files.api import Record
+from invenio_records_files.hashing import xxhash
+from invenio_records_files.models import RecordsBuckets
+from invenio_records_files.storage import save_local_file
 
 
 def test_missing_location(app, db):
@@ -276,3 +292,600 @@ def test_get_version(app, db, location, record):
     assert v2 != v1
     assert record.files["hello.txt"].get_version().version_id == v2
     assert record.files["hello.txt"].get_version(v1).version_id == v1
+
+
+def test_files_verify(app, db, location, record):
+    """Test parallel verification of the checksums of the files."""
+    record.files["hello.txt"] = BytesIO(b"Hello world!")
+    record.files["second.txt"] = BytesIO(b"Second file.")
+    record.files["third.txt"] = BytesIO(b"Third file.")
+
+    report = record.files.verify(workers=2)
+    assert [r["key"] for r in report] == ["hello.txt", "second.txt", "third.txt"]
+    assert all(r["valid"] and r["error"] is None for r in report)
+    assert report[0]["computed"] == record.files["hello.txt"]["checksum"]
+
+    # Corrupt a file on disk.
+    with open(record.files["second.txt"].file.uri, "wb") as fp:
+        fp.write(b"Corrupted!!!")
+    # Make the record metadata disagree with the file instance.
+    record["_files"][2]["checksum"] = "md5:0"
+    # Remove a file from disk.
+    os.remove(record.files["hello.txt"].file.uri)
+
+    report = {r["key"]: r for r in record.files.verify()}
+    assert not report["hello.txt"]["valid"]
+    assert report["hello.txt"]["error"]
+    assert not report["second.txt"]["valid"]
+    assert report["second.txt"]["computed"] != report["second.txt"]["checksum"]
+    assert not report["third.txt"]["valid"]
+    assert report["third.txt"]["computed"] == report["third.txt"]["checksum"]
+
+
+def test_files_extra_checksums(app, db, location, record):
+    """Test extra checksums computed while storing a file."""
+    data = b"Hello world!" * 1000
+    record.files["before.txt"] = BytesIO(data)
+    assert "checksums" not in record.files["before.txt"].data
+
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["sha256", "blake2b", "xxh64"]
+    record.files["hello.txt"] = BytesIO(data)
+    checksums = record.files["hello.txt"]["checksums"]
+    assert checksums["sha256"] == "sha256:" + hashlib.sha256(data).hexdigest()
+    assert checksums["blake2b"] == "blake2b:" + hashlib.blake2b(data).hexdigest()
+    assert ("xxh64" in checksums) == (xxhash is not None)
+    assert record["_files"][1]["checksums"] == checksums
+    assert record.files["hello.txt"]["checksum"] == (
+        "md5:" + hashlib.md5(data).hexdigest()
+    )
+
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["invalid"]
+    with pytest.raises(ValueError):
+        record.files["invalid.txt"] = BytesIO(data)
+
+
+def test_files_local_ingestion(app, db, location, record, tmpdir):
+    """Test zero-copy ingestion of local files."""
+    data = b"Hello world!" * 100000
+    path = tmpdir.join("hello.txt")
+    path.write(b"skipped" + data, mode="wb")
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["sha256"]
+
+    with mock.patch(
+        "invenio_records_files.api.save_local_file", wraps=save_local_file
+    ) as save:
+        # An open file is read from its current position.
+        with open(str(path), "rb") as fp:
+            fp.seek(7)
+            record.files["from_fp.txt"] = fp
+            assert fp.tell() == len(data) + 7
+        # A path is opened.
+        record.files["from_path.txt"] = str(path)
+        # Other streams are read.
+        record.files["from_stream.txt"] = BytesIO(data)
+        assert save.call_count == 2
+        # Including the ones whose descriptor is not the file they read.
+        with gzip.open(str(tmpdir.join("hello.txt.gz")), "wb") as fp:
+            fp.write(data)
+        with gzip.open(str(tmpdir.join("hello.txt.gz")), "rb") as fp:
+            record.files["from_gzip.txt"] = fp
+        assert save.call_count == 2
+
+    for key, expected in [
+        ("from_fp.txt", data),
+        ("from_path.txt", b"skipped" + data),
+        ("from_stream.txt", data),
+        ("from_gzip.txt", data),
+    ]:
+        fileinstance = record.files[key].file
+        assert fileinstance.readable
+        assert fileinstance.size == len(expected)
+        assert fileinstance.checksum == "md5:" + hashlib.md5(expected).hexdigest()
+        assert record.files[key]["checksums"] == {
+            "sha256": "sha256:" + hashlib.sha256(expected).hexdigest()
+        }
+        with fileinstance.storage().open() as fp:
+            assert fp.read() == expected
+    assert record.bucket.size == 4 * len(data) + 7
+
+    # Empty files are supported too.
+    tmpdir.join("empty.txt").write(b"", mode="wb")
+    record.files["empty.txt"] = str(tmpdir.join("empty.txt"))
+    assert record.files["empty.txt"].file.checksum == (
+        "md5:" + hashlib.md5(b"").hexdigest()
+    )
+
+    # The size limit of the bucket is enforced before copying.
+    record.bucket.quota_size = record.bucket.size + 10
+    with pytest.raises(FileSizeError):
+        record.files["too_big.txt"] = str(path)
+    assert "too_big.txt" not in record.files
+
+
+def test_files_deduplicate(app, db, location, record, tmpdir):
+    """Test deduplication of identical files."""
+    record.files["a.txt"] = BytesIO(b"same")
+    other = Record.create({})
+    other.files["b.txt"] = BytesIO(b"same")
+    assert other.files["b.txt"].file_id != record.files["a.txt"].file_id
+
+    app.config["RECORDS_FILES_DEDUPLICATE"] = True
+    other.files["c.txt"] = BytesIO(b"same")
+    fileinstance = record.files["a.txt"].file
+    assert other.files["c.txt"].file_id == fileinstance.id
+    assert other["_files"][1]["file_id"] == str(fileinstance.id)
+    assert other.bucket.size == 8
+    # Files with another content or from a path are stored.
+    other.files["d.txt"] = BytesIO(b"different")
+    assert other.files["d.txt"].file_id != fileinstance.id
+    tmpdir.join("e.txt").write(b"same", mode="wb")
+    other.files["e.txt"] = str(tmpdir.join("e.txt"))
+    assert other.files["e.txt"].file_id == fileinstance.id
+    objs = other.files.import_from([(str(tmpdir.join("e.txt")), "f.txt")])
+    assert objs[0].file_id == fileinstance.id
+    assert other["_files"][-1]["file_id"] == str(fileinstance.id)
+    db.session.commit()
+
+    # Only the first file and the different one are stored.
+    assert FileInstance.query.count() == 3
+
+    # A file with a colliding checksum is not linked.
+    other.files["g.txt"] = BytesIO(b"evil!!")
+    planted = other.files["g.txt"].file
+    planted.checksum = "md5:" + hashlib.md5(b"victim").hexdigest()
+    other.files["h.txt"] = BytesIO(b"victim")
+    assert other.files["h.txt"].file_id != planted.id
+    with other.files["h.txt"].file.storage().open() as fp:
+        assert fp.read() == b"victim"
+    with other.files["c.txt"].file.storage().open() as fp:
+        assert fp.read() == b"same"
+
+
+def test_files_sync(app, db, location, record, tmpdir):
+    """Test differential sync of the files of a record."""
+    for key, data in [("a.txt", b"a"), ("b.txt", b"b"), ("c.txt", b"c")]:
+        record.files[key] = BytesIO(data)
+    record.files["a.txt"]["type"] = "txt"
+
+    def entry(data, stream=None):
+        return {
+            "checksum": "md5:" + hashlib.md5(data).hexdigest(),
+            "size": len(data),
+            "stream": stream or mock.Mock(side_effect=lambda: BytesIO(data)),
+        }
+
+    tmpdir.join("d.txt").write(b"d", mode="wb")
+    manifest = {
+        "b.txt": entry(b"b"),
+        "c.txt": entry(b"new c"),
+        "renamed.txt": entry(b"a"),
+        "d.txt": entry(b"d", stream=str(tmpdir.join("d.txt"))),
+    }
+    with mock.patch.object(record.files_iter_cls, "flush") as flush:
+        summary = record.files.sync(manifest)
+        assert flush.call_count == 1
+    assert summary == {
+        "added": ["d.txt"],
+        "updated": ["c.txt"],
+        "renamed": [("a.txt", "renamed.txt")],
+        "deleted": [],
+        "unchanged": ["b.txt"],
+    }
+    assert not manifest["b.txt"]["stream"].called
+    assert not manifest["renamed.txt"]["stream"].called
+
+    record.files.flush()
+    files = record.files
+    assert sorted(files.keys) == ["b.txt", "c.txt", "d.txt", "renamed.txt"]
+    assert sorted(o.key for o in ObjectVersion.get_by_bucket(record.bucket)) == [
+        "b.txt",
+        "c.txt",
+        "d.txt",
+        "renamed.txt",
+    ]
+    assert files["renamed.txt"]["type"] == "txt"
+    assert files["renamed.txt"].get_version().file.size == 1
+    with files["c.txt"].file.storage().open() as fp:
+        assert fp.read() == b"new c"
+    # Like ObjectVersion.create(), updates do not subtract the previous size.
+    assert record.bucket.size == 9
+
+    summary = record.files.sync({"b.txt": entry(b"b")})
+    assert sorted(summary["deleted"]) == ["c.txt", "d.txt", "renamed.txt"]
+    assert [f["key"] for f in record["_files"]] == ["b.txt"]
+    assert [o.key for o in ObjectVersion.get_by_bucket(record.bucket)] == ["b.txt"]
+    assert record.bucket.size == 2
+
+    # A key whose head is a delete marker is renamed to without a second head.
+    record.files["c.txt"] = BytesIO(b"c")
+    del record.files["c.txt"]
+    summary = record.files.sync({"c.txt": entry(b"b")})
+    assert summary["renamed"] == [("b.txt", "c.txt")]
+    heads = ObjectVersion.query.filter_by(
+        bucket_id=record.bucket.id, key="c.txt", is_head=True
+    ).all()
+    assert len(heads) == 1 and heads[0].file.size == 1
+    record.files["c.txt"] = BytesIO(b"new c")
+    assert [o.key for o in ObjectVersion.get_by_bucket(record.bucket)] == ["c.txt"]
+
+
+def test_record_clone_files_from(app, db, location, record):
+    """Test cloning the files of a record without copying them."""
+    record.files["a.txt"] = BytesIO(b"a")
+    record.files["b.txt"] = BytesIO(b"bb")
+    record.files["a.txt"]["type"] = "txt"
+    record.files.sort_by("b.txt", "a.txt")
+    ObjectVersionTag.create(record.files["a.txt"].obj, "mimetype", "text/plain")
+    record.commit()
+    # An object missing from the files of the record is cloned too.
+    ObjectVersion.create(record.bucket, "c.txt", stream=BytesIO(b"ccc"))
+
+    # The quota of the destination is checked first.
+    full = Record.create({})
+    full.bucket.quota_size = 5
+    with pytest.raises(FileSizeError):
+        full.clone_files_from(record)
+    assert ObjectVersion.query.filter_by(bucket_id=full.bucket.id).count() == 0
+    assert full.bucket.size == 0
+
+    clone = Record.create({})
+    clone.clone_files_from(record)
+    clone.commit()
+
+    assert [f["key"] for f in clone["_files"]] == ["b.txt", "a.txt", "c.txt"]
+    assert clone.files["a.txt"]["type"] == "txt"
+    assert clone.files["c.txt"]["size"] == 3
+    assert clone.bucket.size == 6
+    for key in ["a.txt", "b.txt", "c.txt"]:
+        obj = clone.files[key].obj
+        assert str(obj.bucket_id) == clone.bucket_id
+        assert obj.file_id == record.files[key].obj.file_id
+        assert obj.version_id != record.files[key].obj.version_id
+        data = clone.files[key].data
+        assert data["bucket"] == str(clone.bucket_id)
+        assert data["version_id"] == str(obj.version_id)
+    assert clone.files["a.txt"].obj.get_tags() == {"mimetype": "text/plain"}
+    assert FileInstance.query.count() == 3
+
+    # The destination must be empty.
+    with pytest.raises(InvalidOperationError):
+        clone.clone_files_from(record)
+
+
+def test_files_upload_multipart(app, db, location, record, tmpdir):
+    """Test parallel and resumable multipart uploads of local files."""
+    from invenio_records_files import api
+
+    app.config["FILES_REST_MULTIPART_CHUNKSIZE_MIN"] = 100
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["sha256"]
+    data = os.urandom(1000)
+    path = tmpdir.join("big.bin")
+    path.write(data, mode="wb")
+
+    def failing_upload_part(app, storage, path, offset, size):
+        if offset == 512:
+            raise IOError("Interrupted.")
+        return upload_part(app, storage, path, offset, size)
+
+    upload_part = api._upload_part
+    with mock.patch.object(api, "_upload_part", side_effect=failing_upload_part):
+        with pytest.raises(IOError):
+            record.files.upload_multipart("big.bin", str(path), chunk_size=128)
+    uploaded = Part.query.count()
+    assert 0 < uploaded < 8
+    assert "big.bin" not in record.files
+
+    with mock.patch.object(api, "_upload_part", side_effect=upload_part) as upload:
+        obj = record.files.upload_multipart(
+            "big.bin", str(path), chunk_size=128, workers=3
+        )
+        assert upload.call_count == 8 - uploaded
+    assert MultipartObject.query.count() == 0
+    assert Part.query.count() == 0
+
+    assert obj.key == "big.bin"
+    assert obj.file.readable
+    assert obj.file.size == 1000
+    assert obj.file.checksum == "md5:" + hashlib.md5(data).hexdigest()
+    with obj.file.storage().open() as fp:
+        assert fp.read() == data
+    assert record["_files"][0]["key"] == "big.bin"
+    assert record.files["big.bin"]["checksums"] == {
+        "sha256": "sha256:" + hashlib.sha256(data).hexdigest()
+    }
+    assert record.bucket.size == 1000
+
+    # Small files are not split.
+    path.write(b"small", mode="wb")
+    obj = record.files.upload_multipart("small.txt", str(path))
+    assert obj.file.size == 5
+    assert MultipartObject.query.count() == 0
+
+
+def test_files_upload_multipart_changed(app, db, location, record, tmpdir):
+    """Test resumed multipart uploads of a changed local file."""
+    from invenio_records_files import api
+
+    app.config["FILES_REST_MULTIPART_CHUNKSIZE_MIN"] = 100
+    path = tmpdir.join("big.bin")
+    path.write(os.urandom(1000), mode="wb")
+
+    with db.session.begin_nested():
+        with pytest.raises(InvalidOperationError):
+            record.files.upload_multipart("big.bin", str(path), chunk_size=128)
+
+    def failing_upload_part(app, storage, path, offset, size):
+        if offset == 512:
+            raise IOError("Interrupted.")
+        return upload_part(app, storage, path, offset, size)
+
+    upload_part = api._upload_part
+    with mock.patch.object(api, "_upload_part", side_effect=failing_upload_part):
+        with pytest.raises(IOError):
+            record.files.upload_multipart("big.bin", str(path), chunk_size=128)
+    assert Part.query.count() > 0
+
+    # The upload of another size cannot be resumed.
+    upload_id = MultipartObject.query.one().upload_id
+    tmpdir.join("other.bin").write(os.urandom(1100), mode="wb")
+    with pytest.raises(InvalidOperationError):
+        record.files.upload_multipart(
+            "big.bin", str(tmpdir.join("other.bin")), upload_id=upload_id
+        )
+
+    # Same size, other content: the parts already uploaded are not reused.
+    data = os.urandom(1000)
+    path.write(data, mode="wb")
+    with mock.patch.object(api, "_upload_part", side_effect=upload_part) as upload:
+        obj = record.files.upload_multipart("big.bin", str(path), chunk_size=128)
+        assert upload.call_count == 8
+    assert obj.file.checksum == "md5:" + hashlib.md5(data).hexdigest()
+    with obj.file.storage().open() as fp:
+        assert fp.read() == data
+
+
+def test_files_manifest(app, db, location, record):
+    """Test out-of-line storage of the list of files."""
+    app.config["RECORDS_FILES_MANIFEST_INLINE_LIMIT"] = 2
+    for key in ["a.txt", "b.txt", "c.txt"]:
+        record.files[key] = BytesIO(key.encode("utf-8"))
+    record.files["c.txt"]["type"] = "txt"
+    record.files.flush()
+    record.commit()
+    db.session.commit()
+
+    assert [f["key"] for f in record["_files"]] == ["a.txt", "b.txt"]
+    records_buckets = RecordsBuckets.query.filter_by(record_id=record.id).one()
+    assert [f["key"] for f in records_buckets.files] == ["a.txt", "b.txt", "c.txt"]
+
+    record = Record.get_record(record.id)
+    files = record.files
+    assert list(files.keys) == ["a.txt", "b.txt", "c.txt"]
+    assert files["c.txt"]["type"] == "txt"
+    assert [f.key for f in files] == ["a.txt", "b.txt", "c.txt"]
+
+    clone = Record.create({})
+    clone.clone_files_from(record)
+    assert list(clone.files.keys) == ["a.txt", "b.txt", "c.txt"]
+    assert len(clone["_files"]) == 2
+
+    # Back to inline storage.
+    app.config["RECORDS_FILES_MANIFEST_INLINE_LIMIT"] = None
+    files.flush()
+    assert records_buckets.manifest is None
+    assert [f["key"] for f in record["_files"]] == ["a.txt", "b.txt", "c.txt"]
+
+
+@pytest.mark.parametrize("inline_limit", [None, 1])
+def test_files_merge(app, db, location, record, inline_limit):
+    """Test per-key merge of the files of concurrently updated records."""
+    app.config["RECORDS_FILES_MANIFEST_INLINE_LIMIT"] = inline_limit
+    with pytest.raises(RuntimeError):
+        record.files.merge()
+    record.files.begin_merge()
+    record.files["a.txt"] = BytesIO(b"a")
+    record.files["b.txt"] = BytesIO(b"b")
+    record.files.merge()
+    db.session.commit()
+
+    first = Record.get_record(record.id)
+    second = Record.get_record(record.id)
+    first.files.begin_merge()
+    second.files.begin_merge()
+    first.files["c.txt"] = BytesIO(b"c")
+    first.files["a.txt"]["type"] = "txt"
+    first.files.merge()
+    db.session.commit()
+
+    # The second record does not know about the changes of the first one.
+    second["title"] = "discarded"
+    second.files["d.txt"] = BytesIO(b"d")
+    del second.files["b.txt"]
+    record = second.files.merge()
+    db.session.commit()
+
+    assert record["title"] == "fuu"
+    record = Record.get_record(record.id)
+    assert list(record.files.keys) == ["a.txt", "c.txt", "d.txt"]
+    assert record.files["a.txt"]["type"] == "txt"
+    assert len(record["_files"]) == (inline_limit or 3)
+
+    # The files are remembered again when the record is committed.
+    record.files.begin_merge()
+    record.files["e.txt"] = BytesIO(b"e")
+    record.commit()
+    db.session.commit()
+    del record.files["e.txt"]
+    record = record.files.merge()
+    db.session.commit()
+    assert list(Record.get_record(record.id).files.keys) == [
+        "a.txt",
+        "c.txt",
+        "d.txt",
+    ]
+
+
+def test_files_deferred_flush(app, db, location):
+    """Test writing the files of the records when committing."""
+    app.config["RECORDS_FILES_DEFERRED_FLUSH"] = True
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["sha256"]
+    records = [Record.create({}) for _ in range(2)]
+    db.session.commit()
+
+    with mock.patch.object(
+        Record.files_iter_cls,
+        "dumps",
+        autospec=True,
+        side_effect=Record.files_iter_cls.dumps,
+    ) as dumps:
+        for record in records:
+            record.files["a.txt"] = BytesIO(b"a")
+            record.files["b.txt"] = BytesIO(b"b")
+            record.files["a.txt"]["type"] = "txt"
+            record.files.rename("a.txt", "c.txt")
+            record.files.sort_by("c.txt", "b.txt")
+            assert list(record.files.keys) == ["c.txt", "b.txt"]
+            assert "_files" not in record
+            record.commit()
+        assert not dumps.called
+        db.session.commit()
+        assert dumps.call_count == 2
+
+    for record in records:
+        assert [f["key"] for f in record["_files"]] == ["c.txt", "b.txt"]
+        record = Record.get_record(record.id)
+        assert [f["key"] for f in record["_files"]] == ["c.txt", "b.txt"]
+        assert record["_files"][0]["type"] == "txt"
+        assert "sha256" in record["_files"][1]["checksums"]
+
+    # Changes of rolled back transactions are forgotten.
+    record.files["d.txt"] = BytesIO(b"d")
+    db.session.rollback()
+    db.session.commit()
+    assert [f["key"] for f in Record.get_record(record.id)["_files"]] == [
+        "c.txt",
+        "b.txt",
+    ]
+
+
+def test_prefetch_files(app, db, location):
+    """Test loading the files of many records at once."""
+    records = []
+    for i in range(3):
+        record = Record.create({})
+        record.files["a.txt"] = BytesIO(b"a")
+        record.files["b{0}.txt".format(i)] = BytesIO(b"b")
+        record.commit()
+        records.append(record)
+    records.append(Record.create({}, with_bucket=False))
+    ids = [record.id for record in records]
+    db.session.commit()
+    db.session.expunge_all()
+    records = sorted(Record.get_records(ids), key=lambda r: ids.index(r.id))
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert Record.prefetch_files(records) == records
+        assert len(statements) == 2
+        for i, record in enumerate(records[:3]):
+            files = record.files
+            assert len(files) == 2
+            assert "a.txt" in files
+            assert files["a.txt"].file.size == 1
+            assert [f.key for f in files] == ["a.txt", "b{0}.txt".format(i)]
+            assert files.dumps()[0]["checksum"] == files["a.txt"].file.checksum
+            assert record.bucket.id == files.bucket.id
+        assert records[3].files is None
+        assert len(statements) == 2
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    # Changes are not hidden by the prefetched objects.
+    records[0].files["c.txt"] = BytesIO(b"c")
+    assert len(records[0].files) == 3
+
+
+def test_files_import_from(app, db, location, record, tmpdir):
+    """Test parallel import of local files."""
+    tmpdir.join("a.txt").write(b"file a", mode="wb")
+    tmpdir.mkdir("sub").join("b.txt").write(b"file b", mode="wb")
+    tmpdir.join("sub", "c.txt").write(b"file c", mode="wb")
+
+    with mock.patch.object(record.files_iter_cls, "flush") as flush:
+        objs = record.files.import_from(str(tmpdir), workers=2)
+        assert flush.call_count == 1
+    assert [o.key for o in objs] == ["a.txt", "sub/b.txt", "sub/c.txt"]
+    record.files.flush()
+    assert [f["key"] for f in record["_files"]] == ["a.txt", "sub/b.txt", "sub/c.txt"]
+    assert record.files["sub/b.txt"].get_version().file.readable
+    assert record.bucket.size == 18
+    with record.files["sub/c.txt"].file.storage().open() as fp:
+        assert fp.read() == b"file c"
+
+    # Import from a list of path/key pairs, replacing an existing key.
+    app.config["RECORDS_FILES_EXTRA_CHECKSUMS"] = ["sha256"]
+    record.files.import_from([(str(tmpdir.join("sub", "c.txt")), "a.txt")], workers=1)
+    assert len(record.files) == 3
+    assert record.files["a.txt"]["checksum"] == record.files["sub/c.txt"]["checksum"]
+    assert record.files["a.txt"]["checksums"]["sha256"].startswith("sha256:")
+
+    # Errors leave no file behind.
+    def stored_files():
+        return sum(len(files) for _, _, files in os.walk(location.uri))
+
+    stored = stored_files()
+    with pytest.raises(IOError):
+        record.files.import_from(
+            [(str(tmpdir.join("a.txt")), "new.txt"), (str(tmpdir.join("x")), "x")]
+        )
+    assert "new.txt" not in record.files
+    assert stored_files() == stored
+
+    record.bucket.quota_size = 10
+    with pytest.raises(FileSizeError):
+        record.files.import_from(str(tmpdir))
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_record_delete_many(app, db, location, force):
+    """Test deleting many records at once."""
+    records = []
+    for i in range(3):
+        record = Record.create({"title": "rec{0}".format(i)})
+        record.files["a.txt"] = BytesIO(b"a")
+        records.append(record)
+    kept = Record.create({})
+    db.session.commit()
+    bucket_ids = [record.bucket_id for record in records]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert Record.delete_many(records, force=force, mark_buckets=True) == records
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    db.session.commit()
+    assert (
+        len([s for s in statements if s.startswith("DELETE FROM records_buckets")])
+        == force
+    )
+    # One query for the buckets of all the records.
+    assert len([s for s in statements if "FROM records_buckets" in s]) == 1 + force
+
+    assert RecordsBuckets.query.count() == 1 + (0 if force else 3)
+    assert RecordsBuckets.query.filter_by(record_id=kept.id).count() == 1
+    for bucket_id in bucket_ids:
+        bucket = Bucket.query.get(bucket_id)
+        assert bucket.deleted and not bucket.locked
+    assert not Bucket.query.get(kept.bucket_id).deleted
+    assert Record.get_records([r.id for r in records]) == []
+
+    # Locking the buckets only.
+    other = Record.create({})
+    Record.delete_many([other], lock_buckets=True)
+    bucket = Bucket.query.get(other.bucket_id)
+    assert bucket.locked and not bucket.deleted
+    assert Record.delete_many([]) == []
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test the command-line interface."""
+
+from __future__ import absolute_import, print_function
+
+import json
+import os
+
+from invenio_files_rest.cli import files as files_rest
+from invenio_files_rest.models import Bucket, FileInstance, ObjectVersion
+from six import BytesIO
+
+from invenio_records_files.api import Record
+from invenio_records_files.cli import records_files
+
+
+def test_group_name():
+    """Test the commands do not hide the ones of Invenio-Files-REST."""
+    assert records_files.name == "records-files"
+    assert records_files.name != files_rest.name
+
+
+def test_audit(app, db, location, tmpdir):
+    """Test the fixity audit command."""
+    records = [Record.create({"title": "rec{0}".format(i)}) for i in range(3)]
+    for i, record in enumerate(records):
+        record.files["data.txt"] = BytesIO(b"data of record %d" % i)
+        record.commit()
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    for workers in ("0", "2"):
+        result = runner.invoke(
+            records_files,
+            ["audit", "-w", workers, "--chunk-size", "2", "--max-rate", "10000"],
+        )
+        assert result.exit_code == 0, result.output
+        assert "Checked 3 files, 0 failed." in result.output
+    assert all(f.last_check for f in FileInstance.query.all())
+
+    corrupted = records[1].files["data.txt"].file
+    with open(corrupted.uri, "wb") as fp:
+        fp.write(b"corrupted")
+
+    checkpoint = os.path.join(str(tmpdir), "audit.json")
+    result = runner.invoke(
+        records_files,
+        ["audit", "-w", "1", "--chunk-size", "1", "--checkpoint", checkpoint],
+    )
+    assert result.exit_code == 1
+    assert "Checked 3 files, 1 failed." in result.output
+    assert str(records[1].id) in result.output
+    assert FileInstance.get(corrupted.id).last_check is False
+    with open(checkpoint) as fp:
+        assert json.load(fp)["after"] == str(max(r.id for r in records))
+
+    # Resuming from the checkpoint of a complete audit checks nothing.
+    result = runner.invoke(records_files, ["audit", "--checkpoint", checkpoint])
+    assert "Checked 0 files, 0 failed." in result.output
+
+
+def test_reconcile(app, db, location):
+    """Test the reconciliation command."""
+    record = Record.create({"title": "rec"})
+    record.files["data.txt"] = BytesIO(b"data")
+    record.commit()
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(records_files, ["reconcile"])
+    assert result.exit_code == 0, result.output
+    assert "0 records mismatched." in result.output
+
+    ObjectVersion.create(record.bucket, "other.txt", stream=BytesIO(b"other"))
+    db.session.commit()
+    result = runner.invoke(records_files, ["reconcile", "--chunk-size", "10"])
+    assert result.exit_code == 1
+    assert "{0}: missing other.txt".format(record.id) in result.output
+
+    result = runner.invoke(records_files, ["reconcile", "--repair"])
+    assert result.exit_code == 0, result.output
+    assert "1 records mismatched, repaired." in result.output
+    result = runner.invoke(records_files, ["reconcile", "--after", str(record.id)])
+    assert "0 records mismatched." in result.output
+
+
+def test_rebuild(app, db, location):
+    """Test the rebuild command."""
+    record = Record.create({"title": "rec"})
+    record.files["data.txt"] = BytesIO(b"data")
+    record.commit()
+    ObjectVersion.create(record.bucket, "other.txt", stream=BytesIO(b"other"))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(records_files, ["rebuild", "-w", "0"])
+    assert result.exit_code == 0, result.output
+    assert "Rebuilt 1 records (" in result.output
+    assert len(Record.get_record(record.id)["_files"]) == 2
+
+
+def test_gc(app, db, location):
+    """Test the orphaned buckets collection command."""
+    record = Record.create({"title": "rec"})
+    record.files["data.txt"] = BytesIO(b"data")
+    record.delete(force=True, mark_bucket=True)
+    Bucket.create()
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(records_files, ["gc", "--older-than", "0", "--unlinked"])
+    assert result.exit_code == 0, result.output
+    assert "Found 2 orphaned buckets, 1 files, 4 bytes." in result.output
+
+    result = runner.invoke(records_files, ["gc"])
+    assert result.exit_code == 0, result.output
+    assert "Found 0 orphaned buckets, 0 files, 0 bytes." in result.output
+
+    result = runner.invoke(records_files, ["gc", "--older-than", "0"])
+    assert result.exit_code == 0, result.output
+    assert "Found 1 orphaned buckets, 1 files, 4 bytes." in result.output
+
+    result = runner.invoke(records_files, ["gc", "--older-than", "0", "--remove"])
+    assert "Removed 1 orphaned buckets, 1 files, 4 bytes." in result.output
+    assert FileInstance.query.count() == 0
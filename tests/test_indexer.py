@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test indexing of the record files."""
+
+from __future__ import absolute_import, print_function
+
+import mock
+from invenio_indexer.signals import before_record_index
+from six import BytesIO
+from sqlalchemy import event
+
+from invenio_records_files.api import Record
+from invenio_records_files.indexer import FilesRecordIndexer, index_files
+
+
+def test_index_files(app, db, location):
+    """Test the refresh of the files of an indexed record."""
+    record = Record.create({})
+    record.files["a.txt"] = BytesIO(b"a")
+    record.files["b.txt"] = BytesIO(b"b")
+
+    json = {"_files": []}
+    before_record_index.connect(index_files)
+    try:
+        before_record_index.send(app, json=json, record=record, index="records")
+    finally:
+        before_record_index.disconnect(index_files)
+    assert json["_files"] == record.files.dumps()
+    assert [f["key"] for f in json["_files"]] == ["a.txt", "b.txt"]
+
+    # Records without bucket are left unchanged.
+    json = {"title": "Test"}
+    index_files(app, json=json, record=Record.create({}, with_bucket=False))
+    assert json == {"title": "Test"}
+
+
+def test_files_record_indexer(app, db, location):
+    """Test bulk indexing of records with their files."""
+    ids = []
+    for i in range(5):
+        record = Record.create({"title": "Test {0}".format(i)})
+        record.files["{0}.txt".format(i)] = BytesIO(b"x" * i)
+        ids.append(str(record.id))
+    db.session.commit()
+    db.session.expunge_all()
+
+    messages = [
+        mock.Mock(**{"decode.return_value": {"id": id_, "op": "index"}}) for id_ in ids
+    ]
+    messages.append(
+        mock.Mock(
+            **{
+                "decode.return_value": {
+                    "id": ids[0],
+                    "op": "delete",
+                    "index": "records",
+                }
+            }
+        )
+    )
+
+    indexer = FilesRecordIndexer(record_cls=Record, chunk_size=3)
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        with mock.patch.object(indexer, "record_to_index", return_value="records"):
+            actions = list(indexer._actionsiter(messages))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+    # Three queries per chunk of records.
+    assert len(statements) == 6
+    assert [a["_id"] for a in actions] == ids + [ids[0]]
+    assert [a["_op_type"] for a in actions] == ["index"] * 5 + ["delete"]
+    for i, action in enumerate(actions[:5]):
+        files = action["_source"]["_files"]
+        assert [(f["key"], f["size"]) for f in files] == [("{0}.txt".format(i), i)]
+    assert all(message.ack.called for message in messages)
@@ -12,6 +12,7 @@
 
 from __future__ import absolute_import, print_function
 
+import mock
 import pytest
 
 
@@ -22,6 +23,48 @@ def test_version():
     assert __version__
 
 
+def test_init_permission_cache():
+    """Test the permission cache is created only when enabled."""
+    from flask import Flask
+
+    from invenio_records_files import InvenioRecordsFiles
+
+    app = Flask("testapp")
+    assert InvenioRecordsFiles(app).permission_cache is None
+
+    app = Flask("testapp")
+    app.config["RECORDS_FILES_PERMISSION_CACHE_TTL"] = 30
+    ext = InvenioRecordsFiles(app)
+    assert ext.permission_cache.ttl == 30
+    assert ext.permission_cache.stats["hit_rate"] == 0.0
+
+
+def test_init_reindex_queue():
+    """Test the queued records are reindexed when the process exits."""
+    from flask import Flask
+    from invenio_db import db
+    from sqlalchemy import event
+
+    from invenio_records_files import InvenioRecordsFiles
+    from invenio_records_files.reindex import (
+        discard_reindex,
+        enqueue_reindex,
+        queue_reindex,
+    )
+    from invenio_records_files.signals import record_files_changed
+
+    app = Flask("testapp")
+    app.config["RECORDS_FILES_REINDEX_DELAY"] = 1
+    with mock.patch("atexit.register") as register:
+        ext = InvenioRecordsFiles(app)
+    try:
+        register.assert_called_once_with(ext.reindex_queue.stop)
+    finally:
+        record_files_changed.disconnect(queue_reindex)
+        event.remove(db.session, "after_commit", enqueue_reindex)
+        event.remove(db.session, "after_transaction_end", discard_reindex)
+
+
 def test_jsonschemas_import():
     """Test jsonschemas import."""
     from invenio_records_files import jsonschemas
@@ -17,7 +17,9 @@ from invenio_records.models import RecordMetadata
 
 from invenio_records_files.api import RecordsBuckets
 from invenio_records_files.links import (
+    default_bucket_link_batch_factory,
     default_bucket_link_factory,
+    default_record_files_links_batch_factory,
     default_record_files_links_factory,
 )
 
@@ -59,3 +61,44 @@ def test_record_files_link_factory(app, db, location, bucket):
             "files": "http://localhost/records/1/files",
             "self": "http://localhost/records/1",
         }
+
+
+def test_bucket_link_batch_factory(app, db, location, bucket):
+    """Test bucket link factory for many records at once."""
+    with app.test_request_context():
+        with db.session.begin_nested():
+            record = RecordMetadata()
+            RecordsBuckets.create(record, bucket)
+            db.session.add(record)
+            no_bucket_record = RecordMetadata()
+            db.session.add(no_bucket_record)
+        pid = mock.Mock()
+        pid.get_assigned_object.return_value = record.id
+        no_bucket_pid = mock.Mock()
+        no_bucket_pid.get_assigned_object.return_value = no_bucket_record.id
+
+        assert default_bucket_link_batch_factory([pid, None, no_bucket_pid, pid]) == [
+            url_for(
+                "invenio_files_rest.bucket_api", bucket_id=bucket.id, _external=True
+            ),
+            None,
+            None,
+            url_for(
+                "invenio_files_rest.bucket_api", bucket_id=bucket.id, _external=True
+            ),
+        ]
+        assert default_bucket_link_batch_factory([]) == []
+
+
+def test_record_files_link_batch_factory(app, db, location):
+    """Test record files link factory for many records at once."""
+    with app.test_request_context():
+        pids = []
+        for pid_value in (1, 2):
+            pid = mock.Mock()
+            pid.pid_value = pid_value
+            pid.pid_type = "recid"
+            pids.append(pid)
+        assert default_record_files_links_batch_factory(pids) == [
+            default_record_files_links_factory(pid) for pid in pids
+        ]
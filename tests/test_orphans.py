@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test garbage collection of orphaned buckets."""
+
+from __future__ import absolute_import, print_function
+
+import os
+from datetime import timedelta
+
+from invenio_files_rest.models import (
+    Bucket,
+    FileInstance,
+    MultipartObject,
+    ObjectVersion,
+    ObjectVersionTag,
+)
+from six import BytesIO
+
+from invenio_records_files.api import Record
+from invenio_records_files.models import RecordsBuckets
+from invenio_records_files.orphans import collect_orphaned_buckets
+
+
+def test_collect_orphaned_buckets(app, db, location):
+    """Test finding, marking and removing orphaned buckets."""
+    app.config["FILES_REST_MULTIPART_CHUNKSIZE_MIN"] = 50
+    live = Record.create({"title": "live"})
+    live.files["live.txt"] = BytesIO(b"live")
+
+    forced = Record.create({"title": "forced"})
+    forced.files["a.txt"] = BytesIO(b"aaaaa")
+    forced.files["a.txt"] = BytesIO(b"aaaaaa")
+    forced.files["shared.txt"] = BytesIO(b"shared")
+    ObjectVersionTag.create(forced.files["a.txt"].obj, "tag", "value")
+    MultipartObject.create(forced.bucket, "big.bin", 100, 50)
+    live.files.rename("live.txt", "live2.txt")
+    ObjectVersion.create(
+        live.bucket, "shared.txt", _file_id=forced.files["shared.txt"].file_id
+    )
+    forced_bucket = forced.bucket.id
+    forced_uris = [
+        obj.file.uri for obj in ObjectVersion.get_versions(forced.bucket, "a.txt")
+    ]
+    forced.delete(force=True, mark_bucket=True)
+
+    soft = Record.create({"title": "soft"})
+    soft.files["soft.txt"] = BytesIO(b"soft")
+    soft_bucket = soft.bucket.id
+    soft.delete()
+
+    # Buckets which may belong to other modules.
+    unlinked = Record.create({"title": "unlinked"})
+    unlinked_bucket = unlinked.bucket.id
+    unlinked.delete(force=True)
+    standalone = Bucket.create().id
+    db.session.commit()
+
+    results = list(collect_orphaned_buckets(chunk_size=1))
+    assert [r["bucket_id"] for r in results] == [forced_bucket]
+    results = list(collect_orphaned_buckets(chunk_size=1, include_unlinked=True))
+    assert sorted(r["bucket_id"] for r in results) == sorted(
+        [forced_bucket, unlinked_bucket, standalone]
+    )
+    forced_result = next(r for r in results if r["bucket_id"] == forced_bucket)
+    # Both versions of a.txt and the multipart file, but not the shared file.
+    assert forced_result == {
+        "bucket_id": forced_bucket,
+        "record_id": None,
+        "files": 3,
+        "size": 111,
+    }
+
+    results = list(collect_orphaned_buckets(include_deleted_records=True))
+    assert len(results) == 2
+    soft_result = next(r for r in results if r["bucket_id"] == soft_bucket)
+    assert soft_result["record_id"] == soft.id
+    assert soft_result["size"] == 4
+
+    assert list(collect_orphaned_buckets(older_than=timedelta(days=1))) == []
+
+    list(collect_orphaned_buckets(action="mark", include_unlinked=True, max_rate=100))
+    assert Bucket.get(standalone) is None
+    assert Bucket.query.get(standalone).deleted
+    assert not Bucket.query.get(soft_bucket).deleted
+
+    results = list(
+        collect_orphaned_buckets(action="remove", include_deleted_records=True)
+    )
+    assert len(results) == 4
+    assert list(collect_orphaned_buckets(include_deleted_records=True)) == []
+    assert Bucket.query.get(forced_bucket) is None
+    assert RecordsBuckets.query.filter_by(record_id=soft.id).count() == 0
+    assert ObjectVersion.query.filter_by(bucket_id=soft_bucket).count() == 0
+    assert ObjectVersionTag.query.count() == 0
+    assert not any(os.path.exists(uri) for uri in forced_uris)
+
+    # The live record is untouched.
+    live = Record.get_record(live.id)
+    assert sorted(f.key for f in live.files) == ["live2.txt", "shared.txt"]
+    with live.files["shared.txt"].obj.file.storage().open() as fp:
+        assert fp.read() == b"shared"
+    assert FileInstance.query.count() == 2
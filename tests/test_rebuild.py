@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test rebuild of the files of all the records."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+from invenio_files_rest.models import ObjectVersion
+from six import BytesIO
+
+from invenio_records_files.api import Record
+from invenio_records_files.rebuild import rebuild_files
+
+
+def _create_records(db, count):
+    """Create records whose buckets changed behind their back."""
+    ids = []
+    for i in range(count):
+        record = Record.create({"title": "rec{0}".format(i)})
+        record.files["a.txt"] = BytesIO(b"a")
+        record.commit()
+        ObjectVersion.create(record.bucket, "b.txt", stream=BytesIO(b"b"))
+        ids.append(record.id)
+    Record.create({"title": "no bucket"}, with_bucket=False)
+    db.session.commit()
+    return ids
+
+
+def test_rebuild_files(app, db, location):
+    """Test rebuilding the files in the current process."""
+    ids = _create_records(db, 5)
+    assert list(rebuild_files(chunk_size=2, batch_size=1, workers=0)) == [2, 2, 1]
+    for record in Record.get_records(ids):
+        assert [f["key"] for f in record["_files"]] == ["a.txt", "b.txt"]
+        assert record.revision_id == 2
+
+
+def test_rebuild_files_workers(app, db, location):
+    """Test rebuilding the files in a pool of processes.
+
+    Skipped with the default in-memory SQLite database, which the forked
+    workers cannot share; run-tests.sh runs it against PostgreSQL.
+    """
+    if db.engine.url.database in (None, "", ":memory:"):
+        pytest.skip("The workers need a database shared between processes.")
+    ids = _create_records(db, 5)
+    assert sum(rebuild_files(chunk_size=2, workers=2)) == 5
+    db.session.expire_all()
+    for record in Record.get_records(ids):
+        assert [f["key"] for f in record["_files"]] == ["a.txt", "b.txt"]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test reconciliation of the record files with their buckets."""
+
+from __future__ import absolute_import, print_function
+
+import mock
+from invenio_files_rest.models import ObjectVersion
+from six import BytesIO
+
+from invenio_records_files.api import Record
+from invenio_records_files.reconcile import reconcile_files
+
+
+def test_reconcile_files(app, db, location):
+    """Test finding and repairing drifted records."""
+    records = []
+    for i in range(4):
+        record = Record.create({"title": "rec{0}".format(i)})
+        record.files["a.txt"] = BytesIO(b"a")
+        record.commit()
+        records.append(record)
+    Record.create({"title": "no bucket"}, with_bucket=False)
+    db.session.commit()
+    ids = sorted(record.id for record in records)
+    assert list(reconcile_files(chunk_size=2)) == []
+
+    # Change the buckets without going through the records.
+    drifted = sorted(records[:3], key=lambda r: r.id)
+    ObjectVersion.create(drifted[0].bucket, "b.txt", stream=BytesIO(b"b"))
+    ObjectVersion.delete(drifted[1].bucket, "a.txt")
+    ObjectVersion.create(drifted[2].bucket, "a.txt", stream=BytesIO(b"new"))
+    db.session.commit()
+
+    results = list(reconcile_files(chunk_size=2, max_rate=1000))
+    assert [r["record_id"] for r in results] == [r.id for r in drifted]
+    assert [(r["missing"], r["extra"], r["changed"]) for r in results] == [
+        (["b.txt"], [], []),
+        ([], ["a.txt"], []),
+        ([], [], ["a.txt"]),
+    ]
+    assert not any(r["repaired"] for r in results)
+
+    # Resume after a record.
+    results = list(reconcile_files(after=drifted[1].id))
+    assert [r["record_id"] for r in results] == [drifted[2].id]
+
+    with mock.patch.object(
+        Record, "prefetch_files", side_effect=Record.prefetch_files
+    ) as prefetch_files:
+        results = list(reconcile_files(chunk_size=2, repair=True))
+        # The files of the mismatched records are loaded once per chunk.
+        assert prefetch_files.call_count == 2
+    assert len(results) == 3
+    assert all(r["repaired"] for r in results)
+    assert list(reconcile_files()) == []
+
+    records = {r.id: r for r in Record.get_records(ids)}
+    assert [f["key"] for f in records[drifted[0].id]["_files"]] == ["a.txt", "b.txt"]
+    assert records[drifted[1].id]["_files"] == []
+    assert records[drifted[2].id]["_files"][0]["size"] == 3
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test coalesced reindexing of the records whose files changed."""
+
+from __future__ import absolute_import, print_function
+
+import time
+
+import mock
+from six import BytesIO
+from sqlalchemy import event
+
+from invenio_records_files.api import Record
+from invenio_records_files.reindex import (
+    ReindexQueue,
+    discard_reindex,
+    enqueue_reindex,
+    queue_reindex,
+)
+from invenio_records_files.signals import record_files_changed
+
+
+def test_record_files_changed(app, db, location):
+    """Test the signals sent when the files of a record change."""
+    record = Record.create({})
+    changes = []
+
+    def receiver(sender, record=None, keys=None):
+        changes.append((record.id, keys))
+
+    with record_files_changed.connected_to(receiver):
+        record.files["a.txt"] = BytesIO(b"a")
+        record.files.rename("a.txt", "b.txt")
+        record.files["c.txt"] = BytesIO(b"c")
+        del record.files["c.txt"]
+        record.files.sort_by("b.txt")
+    assert changes == [
+        (record.id, ["a.txt"]),
+        (record.id, ["a.txt", "b.txt"]),
+        (record.id, ["c.txt"]),
+        (record.id, ["c.txt"]),
+    ]
+
+
+def test_reindex_queue(app):
+    """Test the coalescing of the records to reindex."""
+    batches = []
+    queue = ReindexQueue(app, index_records=batches.append, delay=0.2, batch_size=2)
+    for i in range(1000):
+        queue.add("a")
+    queue.add("b", "c")
+    assert len(queue) == 3
+    time.sleep(0.05)
+    queue.add("a")
+    assert batches == []
+
+    deadline = time.monotonic() + 5
+    while len(queue) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    queue.stop()
+    assert batches == [["b", "c"], ["a"]]
+
+    # Changes do not postpone a record for more than the maximum delay.
+    batches = []
+    queue = ReindexQueue(app, index_records=batches.append, delay=10, max_delay=0)
+    queue.add("a")
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert batches == [["a"]]
+
+    # Stopping the queue indexes the pending records.
+    queue.add("b")
+    queue.stop()
+    assert batches == [["a"], ["b"]]
+
+    # Errors are logged.
+    queue = ReindexQueue(app, index_records=mock.Mock(side_effect=ValueError))
+    with mock.patch.object(app.logger, "exception") as log:
+        queue.add("a")
+        queue.stop()
+        assert log.called
+
+
+def test_reindex_after_commit(app, db, location):
+    """Test that the records are queued when the transaction is committed."""
+    ext = app.extensions["invenio-records-files"]
+    ext.reindex_queue = queue = ReindexQueue(app, index_records=mock.Mock(), delay=60)
+    event.listen(db.session, "after_commit", enqueue_reindex)
+    event.listen(db.session, "after_transaction_end", discard_reindex)
+    try:
+        with record_files_changed.connected_to(queue_reindex):
+            record = Record.create({})
+            for i in range(5):
+                record.files["{0}.txt".format(i)] = BytesIO(b"x")
+            assert len(queue) == 0
+            db.session.commit()
+            assert len(queue) == 1
+
+            # Changes rolled back are not reindexed.
+            other = Record.create({})
+            other.files["a.txt"] = BytesIO(b"a")
+            db.session.rollback()
+            db.session.commit()
+            assert len(queue) == 1
+        queue.stop()
+        queue.index_records.assert_called_once_with([record.id])
+    finally:
+        event.remove(db.session, "after_commit", enqueue_reindex)
+        event.remove(db.session, "after_transaction_end", discard_reindex)
+        ext.reindex_queue = None
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Invenio.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+
+"""Test signed download URLs."""
+
+from __future__ import absolute_import, print_function
+
+import hashlib
+import hmac
+
+import mock
+from invenio_files_rest.views import ObjectResource
+from six import BytesIO
+
+from invenio_records_files import config
+from invenio_records_files.signing import sign_object_url
+
+
+def test_signed_object_download(app, db, client, location, record, generic_file):
+    """Test download through a signed URL."""
+    file_ = record.files[generic_file]
+    with app.test_request_context():
+        url = sign_object_url(record.bucket_id, generic_file, _external=False)
+        version_url = sign_object_url(
+            record.bucket_id, generic_file, version_id=file_.version_id, _external=False
+        )
+        expired_url = sign_object_url(
+            record.bucket_id, generic_file, expires_in=-1, _external=False
+        )
+
+    record.files[generic_file] = BytesIO(b"new version")
+    db.session.commit()
+
+    with mock.patch.object(ObjectResource, "check_object_permission") as check:
+        res = client.get(url)
+        assert res.status_code == 200
+        assert res.data == b"new version"
+
+        res = client.get(version_url)
+        assert res.status_code == 200
+        assert res.data == b"test example"
+
+        res = client.get(version_url + "&download")
+        assert res.headers["Content-Disposition"].startswith("attachment")
+        assert not check.called
+
+    assert client.get(expired_url).status_code == 403
+    assert client.get(url.replace(generic_file, "other.txt")).status_code == 403
+    assert client.get(url.replace("signature=", "signature=0")).status_code == 403
+    assert client.get(url.split("?")[0]).status_code == 403
+
+    # The signatures are not keyed with the raw SECRET_KEY.
+    expires = url.split("expires=")[1].split("&")[0]
+    message = "\n".join([record.bucket_id, generic_file, "", expires])
+    raw = hmac.new(b"CHANGE_ME", message.encode("utf-8"), hashlib.sha256)
+    forged = "{0}?signature={1}&expires={2}".format(
+        url.split("?")[0], raw.hexdigest(), expires
+    )
+    assert client.get(forged).status_code == 403
+
+    del record.files[generic_file]
+    db.session.commit()
+    assert client.get(url).status_code == 404
+
+
+def test_signed_url_route_disabled():
+    """Test the signed download URLs are disabled by default."""
+    assert config.RECORDS_FILES_SIGNED_URL_ROUTE is None
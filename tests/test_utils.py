@@ -11,14 +11,19 @@
 
 from __future__ import absolute_import, print_function
 
+import mock
 import pytest
+from flask import g
+from flask_principal import AnonymousIdentity, Identity, RoleNeed
 from invenio_files_rest.models import Bucket
+from invenio_files_rest.views import ObjectResource
 from invenio_records.api import Record as BaseRecord
 from six import BytesIO
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import Forbidden, NotFound
 
 from invenio_records_files.api import Record
 from invenio_records_files.models import RecordsBuckets
+from invenio_records_files.permissions import PermissionCache
 from invenio_records_files.utils import file_download_ui, record_file_factory
 
 
@@ -64,3 +69,75 @@ def test_record_files_factory(app, db, location, record):
     baserecord = BaseRecord.create({})
     RecordsBuckets(bucket=Bucket.create(), record=baserecord)
     assert record_file_factory(None, baserecord, "invalid") is None
+
+
+def test_file_download_ui_permission_cache(app, db, location, record, generic_file):
+    """Test caching of permissions granted for file downloads."""
+    cache = PermissionCache(60)
+    app.extensions["invenio-records-files"].permission_cache = cache
+    pid = type("PID", (object,), {"pid_type": "demo", "pid_value": "1"})()
+
+    def download(identity):
+        with app.test_request_context():
+            g.identity = identity
+            return file_download_ui(pid, record, filename=generic_file)
+
+    with mock.patch.object(
+        ObjectResource, "check_object_permission"
+    ) as check_object_permission:
+        assert download(Identity(1)).status_code == 200
+        assert download(Identity(1)).status_code == 200
+        assert check_object_permission.call_count == 1
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+        assert cache.stats["hit_rate"] == 0.5
+
+        # Decisions are per identity.
+        download(Identity(2))
+        assert check_object_permission.call_count == 2
+
+        # Locking the bucket bypasses and invalidates the cache.
+        record.bucket.locked = True
+        download(Identity(1))
+        assert check_object_permission.call_count == 3
+        assert cache.stats["size"] == 0
+        record.bucket.locked = False
+
+        download(Identity(1))
+        assert check_object_permission.call_count == 4
+        record.delete()
+        assert cache.stats["size"] == 0
+
+    # Denied permissions are not cached.
+    cache.clear()
+    with mock.patch.object(
+        ObjectResource, "check_object_permission", side_effect=Forbidden
+    ):
+        with pytest.raises(Forbidden):
+            download(Identity(1))
+    assert cache.stats["size"] == 0
+
+
+def test_permission_cache_anonymous(app, db, location, record, generic_file):
+    """Test cached permissions are not shared by anonymous identities."""
+    app.extensions["invenio-records-files"].permission_cache = PermissionCache(60)
+    pid = type("PID", (object,), {"pid_type": "demo", "pid_value": "1"})()
+
+    def check_object_permission(obj):
+        if RoleNeed("reader") not in g.identity.provides:
+            raise Forbidden()
+
+    def download(identity):
+        with app.test_request_context():
+            g.identity = identity
+            return file_download_ui(pid, record, filename=generic_file)
+
+    reader = AnonymousIdentity()
+    reader.provides.add(RoleNeed("reader"))
+    with mock.patch.object(
+        ObjectResource, "check_object_permission", side_effect=check_object_permission
+    ):
+        assert download(reader).status_code == 200
+        assert download(reader).status_code == 200
+        with pytest.raises(Forbidden):
+            download(AnonymousIdentity())
@@ -11,9 +11,15 @@
 
 from __future__ import absolute_import, print_function
 
+import io
 import json
+import tarfile
+import zipfile
 
+import mock
 import pytest
+from invenio_files_rest.models import Bucket, ObjectVersion
+from invenio_files_rest.storage import PyFSFileStorage
 
 from invenio_records_files.views import create_blueprint_from_app
 
@@ -47,6 +53,8 @@ def test_record_without_bucket(app, db, client, location, minted_record_no_bucke
         "/records/{0}/files/{1}".format(pid.pid_value, "test.txt"), data=b"test example"
     )
     assert res.status_code == 404
+    res = client.get("/records/{0}/files.zip".format(pid.pid_value))
+    assert res.status_code == 404
 
 
 def test_record_no_files(app, db, client, location, minted_record_no_bucket):
@@ -70,3 +78,125 @@ def test_misconfiguration_of_views(app):
     )
     with pytest.raises(ValueError):
         create_blueprint_from_app(app)
+
+
+def test_head_object(app, client, location, minted_record):
+    """Test HEAD on a record object is answered without the storage."""
+    pid, record = minted_record
+    url = "/records/{0}/files/{1}".format(pid.id, "test.txt")
+    res = client.put(url, data=b"test example")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    with mock.patch.object(PyFSFileStorage, "open") as storage_open:
+        res = client.head(url)
+        assert res.status_code == 200
+        assert res.data == b""
+        assert res.headers["Content-Length"] == str(len(b"test example"))
+        assert res.headers["Content-Type"].startswith("text/plain")
+        assert res.headers["ETag"] == etag
+        assert res.headers["Last-Modified"]
+
+        res = client.head(url, headers={"If-None-Match": etag})
+        assert res.status_code == 304
+
+        res = client.head("/records/{0}/files/missing.txt".format(pid.id))
+        assert res.status_code == 404
+        assert not storage_open.called
+
+    # The headers are the ones of a GET request.
+    bin_url = "/records/{0}/files/{1}".format(pid.id, "data.bin")
+    client.put(bin_url, data=b"binary")
+    for target, query in [(url, {}), (url, {"download": ""}), (bin_url, {})]:
+        get = client.get(target, query_string=query)
+        head = client.head(target, query_string=query)
+        assert head.status_code == get.status_code == 200
+        assert sorted(head.headers.items()) == sorted(get.headers.items())
+    assert head.headers["Content-Disposition"] == "attachment; filename=data.bin"
+
+
+def test_put_object_declared_checksum(app, db, client, location, minted_record):
+    """Test uploads of a declared content already in the bucket."""
+    pid, record = minted_record
+    url = "/records/{0}/files/{1}".format(pid.id, "{0}")
+    res = client.put(url.format("test.txt"), data=b"test example")
+    checksum = res.json["checksum"]
+    version_id = res.json["version_id"]
+    # Same size, other content: the body must not be read.
+    other = b"test exampl!"
+
+    res = client.put(
+        url.format("test.txt"), data=other, headers={"X-Checksum": checksum}
+    )
+    assert res.status_code == 200
+    assert res.json["version_id"] == version_id
+
+    res = client.put(
+        url.format("copy.txt"), data=other, headers={"X-Checksum": checksum}
+    )
+    assert res.status_code == 200
+    assert res.json["checksum"] == checksum
+    assert (
+        ObjectVersion.get(record.bucket_id, "copy.txt").file_id
+        == ObjectVersion.get(record.bucket_id, "test.txt").file_id
+    )
+
+    # Unknown content is uploaded.
+    res = client.put(
+        url.format("other.txt"), data=other, headers={"X-Checksum": "md5:unknown"}
+    )
+    assert res.status_code == 200
+    assert res.json["checksum"] != checksum
+    res = client.get(url.format("other.txt"))
+    assert res.data == other
+
+    # Linked files count towards the quota.
+    bucket = Bucket.get(record.bucket_id)
+    size = bucket.size
+    bucket.quota_size = size + 5
+    db.session.commit()
+    res = client.put(
+        url.format("third.txt"), data=other, headers={"X-Checksum": checksum}
+    )
+    assert res.status_code == 400
+    assert ObjectVersion.get(record.bucket_id, "third.txt") is None
+    assert Bucket.get(record.bucket_id).size == size
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "tar"])
+def test_bucket_archive(app, client, location, minted_record, archive_format):
+    """Test streaming all files of a record as an archive."""
+    pid, record = minted_record
+
+    def read_archive(data):
+        if archive_format == "zip":
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                return {n: archive.read(n) for n in archive.namelist()}
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            return {m.name: archive.extractfile(m).read() for m in archive}
+
+    # A bucket without files gives an empty archive.
+    url = "/records/{0}/files.{1}".format(pid.id, archive_format)
+    res = client.get(url)
+    assert res.status_code == 200
+    assert read_archive(res.data) == {}
+
+    files = {"a/one.txt": b"first file", "a/two.txt": b"second", "b.txt": b"b" * 700}
+    for key, data in files.items():
+        res = client.put("/records/{0}/files/{1}".format(pid.id, key), data=data)
+        assert res.status_code == 200
+
+    res = client.get(url)
+    assert res.status_code == 200
+    assert res.headers["Content-Disposition"] == "attachment; filename={0}.{1}".format(
+        pid.pid_value, archive_format
+    )
+    assert read_archive(res.data) == files
+
+    res = client.get(url, query_string={"prefix": "a/"})
+    assert read_archive(res.data) == {
+        k: v for k, v in files.items() if k.startswith("a/")
+    }
+
+    res = client.get("/records/{0}/files.rar".format(pid.id))
+    assert res.status_code == 404